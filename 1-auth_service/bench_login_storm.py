@@ -0,0 +1,68 @@
+"""
+Benchmark: /verify-token latency while a burst of logins hits /token.
+
+Runs the auth app in-process against a throwaway SQLite database:
+
+    python bench_login_storm.py [logins] [verify_calls]
+
+With bcrypt on its own pool, /verify-token p99 during the storm should stay
+close to the idle baseline; excess logins are shed with 503 instead of queueing.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_auth.db")
+
+import httpx
+import migrate
+from main import app
+
+migrate.upgrade()
+
+EMAIL = "storm@hospital.com"
+PASSWORD = "storm-password"
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def measure_verify(client, token, calls):
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        response = await client.post("/verify-token", headers={"Authorization": f"Bearer {token}"})
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.text
+        await asyncio.sleep(0.005)
+    return latencies
+
+async def login(client):
+    response = await client.post("/token", data={"username": EMAIL, "password": PASSWORD})
+    return response.status_code
+
+def report(label, latencies):
+    print(f"{label:<22} p50={percentile(latencies, 50):7.2f}ms  p99={percentile(latencies, 99):7.2f}ms  max={max(latencies):7.2f}ms")
+
+async def main(logins, verify_calls):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://auth") as client:
+        await client.post("/register", json={"email": EMAIL, "full_name": "Storm", "password": PASSWORD})
+        response = await client.post("/token", data={"username": EMAIL, "password": PASSWORD})
+        token = response.json()["access_token"]
+
+        report("verify (idle)", await measure_verify(client, token, verify_calls))
+
+        storm = asyncio.gather(*(login(client) for _ in range(logins)))
+        latencies = await measure_verify(client, token, verify_calls)
+        statuses = await storm
+        report("verify (login storm)", latencies)
+        print(f"logins: {statuses.count(200)} ok, {statuses.count(503)} shed with 503, {logins} total")
+
+if __name__ == "__main__":
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    verify_calls = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(main(logins, verify_calls))
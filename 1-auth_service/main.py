@@ -1,14 +1,14 @@
 from fastapi import FastAPI, Depends, HTTPException, status, Header
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 import models, database, schema, security
-from database import engine, get_db
-
-models.Base.metadata.create_all(bind=engine)
+from user_cache import load_user, user_cache
+from database import get_db
+from config import SECRET_KEY, ALGORITHM, VERIFY_TOKENS_BATCH_LIMIT
 
 app = FastAPI(title="Hospital Auth Service", version="1.0.0")
 
@@ -20,19 +20,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-SECRET_KEY = "your-secret-key-change-in-production"
-ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 10080  # 7 days (7 * 24 * 60)
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -54,33 +45,46 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = load_user(db, email)
     if user is None:
         raise credentials_exception
     return user
 
+def find_user(db: Session, email: str):
+    try:
+        return db.query(models.User).filter(models.User.email == email).first()
+    finally:
+        # Hand the pooled connection back while bcrypt runs; the session reconnects on commit
+        db.close()
+
+def save_user(db: Session, user: models.User):
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+# Hashing endpoints are async and hand bcrypt to its own pool, so a login
+# burst can't exhaust the request threadpool that other endpoints use.
+# Their database calls still block, so those go to the threadpool and the
+# event loop (and /verify-token with it) never waits on a slow or locked write.
 @app.post("/register", response_model=schema.UserResponse)
-def register(user: schema.UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
-    if db_user:
+async def register(user: schema.UserCreate, db: Session = Depends(get_db)):
+    if await run_in_threadpool(find_user, db, user.email):
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await security.password_hasher.hash(user.password)
     db_user = models.User(
         email=user.email,
         full_name=user.full_name,
         hashed_password=hashed_password,
         role=user.role
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    return await run_in_threadpool(save_user, db, db_user)
 
 @app.post("/token", response_model=schema.Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await run_in_threadpool(find_user, db, form_data.username)
+    if not user or not await security.password_hasher.verify(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -95,28 +99,28 @@ def read_users_me(current_user: models.User = Depends(get_current_user)):
     return current_user
 
 @app.post("/verify-token")
-def verify_token(authorization: str = Header(None)):
-    # Debug logging
-    print(f"[verify-token] Received authorization header: {authorization}")
-    
+async def verify_token(authorization: str = Header(None)):
     if not authorization:
-        print("[verify-token] ERROR: No authorization header provided")
         raise HTTPException(status_code=401, detail="No authorization header")
     
-    try:
-        # Extract token from "Bearer <token>"
-        token = authorization.split(" ")[1] if " " in authorization else authorization
-        print(f"[verify-token] Extracted token: {token[:20]}...")
-        
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print(f"[verify-token] Token validated for user: {payload.get('sub')}")
-        return {"valid": True, "email": payload.get("sub"), "role": payload.get("role")}
-    except JWTError as e:
-        print(f"[verify-token] JWT Error: {str(e)}")
-        raise HTTPException(status_code=401, detail="Invalid token")
-    except Exception as e:
-        print(f"[verify-token] Exception: {str(e)}")
-        raise HTTPException(status_code=401, detail=f"Token verification failed: {str(e)}")
+    # Extract token from "Bearer <token>"
+    token = authorization.split(" ")[1] if " " in authorization else authorization
+    claims = security.decode_token(token)
+    if not claims["valid"]:
+        raise HTTPException(status_code=401, detail=claims["error"])
+    return claims
+
+# Plain def: a large batch decodes on the threadpool instead of the event loop
+@app.post("/verify-tokens", response_model=schema.TokenBatchResult, response_model_exclude_none=True)
+def verify_tokens(batch: schema.TokenBatch):
+    if len(batch.tokens) > VERIFY_TOKENS_BATCH_LIMIT:
+        raise HTTPException(status_code=400, detail=f"At most {VERIFY_TOKENS_BATCH_LIMIT} tokens per request")
+    # Results are in request order; repeated tokens are decoded once thanks to the cache
+    return {"results": [security.decode_token(token) for token in batch.tokens]}
+
+@app.get("/health")
+def health_check():
+    return {"status": "ok", "user_cache": user_cache.snapshot()}
 
 if __name__ == "__main__":
     import uvicorn
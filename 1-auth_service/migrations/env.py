@@ -0,0 +1,30 @@
+"""Alembic environment: migrations run against DATABASE_URL from config.py.
+
+Only online mode is supported; the migrations inspect the live schema so they
+also apply cleanly to databases created by the old create_all at startup.
+"""
+from logging.config import fileConfig
+from alembic import context
+from config import DATABASE_URL
+from database import create_db_engine
+import models
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = models.Base.metadata
+
+if context.is_offline_mode():
+    raise SystemExit("Offline (--sql) migrations are not supported")
+
+engine = create_db_engine(DATABASE_URL)
+try:
+    with engine.connect() as connection:
+        # render_as_batch: SQLite cannot ALTER most things, so autogenerate emits
+        # batch operations that copy the table instead
+        context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True)
+        with context.begin_transaction():
+            context.run_migrations()
+finally:
+    engine.dispose()
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 class UserCreate(BaseModel):
     email: EmailStr
@@ -25,4 +25,16 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     email: Optional[str] = None
-    role: Optional[str] = None
\ No newline at end of file
+    role: Optional[str] = None
+
+class TokenBatch(BaseModel):
+    tokens: List[str]
+
+class TokenClaims(BaseModel):
+    valid: bool
+    email: Optional[str] = None
+    role: Optional[str] = None
+    error: Optional[str] = None
+
+class TokenBatchResult(BaseModel):
+    results: List[TokenClaims]
\ No newline at end of file
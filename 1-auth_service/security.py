@@ -1,9 +1,14 @@
 from passlib.context import CryptContext
-from jose import JWTError, jwt
+from jose import ExpiredSignatureError, JWTError, jwt
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from fastapi import HTTPException, status
+import asyncio
+import threading
+import time
+from config import SECRET_KEY, ALGORITHM, HASH_WORKERS, HASH_QUEUE_SIZE, TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL
 
-SECRET_KEY = "your-secret-key-change-in-production"
-ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -14,6 +19,96 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+class PasswordHasher:
+    """Runs bcrypt on a dedicated bounded thread pool, off the event loop.
+
+    At most ``workers + max_queue`` hashes may be pending; beyond that callers
+    get an immediate 503 instead of piling up behind the pool.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.capacity = workers + max_queue
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    async def _run(self, func, *args):
+        # Only touched from the event loop thread, so no lock is needed
+        if self.pending >= self.capacity:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent logins, please retry",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    async def verify(self, plain_password, hashed_password):
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def hash(self, password):
+        return await self._run(get_password_hash, password)
+
+password_hasher = PasswordHasher(workers=HASH_WORKERS, max_queue=HASH_QUEUE_SIZE)
+
+class TokenCache:
+    """Bounded LRU of decode results keyed by token.
+
+    A token's verdict only changes when it expires, so rejections are kept
+    too; a valid entry never outlives the token's ``exp``.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return claims
+
+    def set(self, token: str, claims: dict, exp=None):
+        expires_at = time.time() + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        with self._lock:
+            self._entries[token] = (claims, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+token_cache = TokenCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+def decode_token(token: str) -> dict:
+    """Claims of a token as /verify-token reports them, or ``valid: False`` with the reason."""
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+
+    exp = None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        claims = {"valid": True, "email": payload.get("sub"), "role": payload.get("role")}
+        exp = payload.get("exp")
+    except ExpiredSignatureError:
+        claims = {"valid": False, "error": "Token has expired"}
+    except JWTError:
+        claims = {"valid": False, "error": "Invalid token"}
+    token_cache.set(token, claims, exp)
+    return claims
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
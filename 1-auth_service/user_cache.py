@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+import models
+from config import USER_CACHE_SIZE, USER_CACHE_TTL
+
+
+class UserCache:
+    """Bounded LRU of detached User rows keyed by email, each kept for ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    def get(self, email: str):
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is not None and entry[1] <= time.monotonic():
+                del self._entries[email]
+                entry = None
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(email)
+            self.stats["hits"] += 1
+            return entry[0]
+
+    def set(self, email: str, user):
+        with self._lock:
+            self._entries[email] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(email)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, *emails):
+        with self._lock:
+            for email in emails:
+                if self._entries.pop(email, None) is not None:
+                    self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else None,
+            }
+
+
+user_cache = UserCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+def load_user(db: Session, email: str):
+    """The user with ``email`` attached to ``db``, from the cache when possible; None if there is none."""
+    cached = user_cache.get(email)
+    if cached is not None:
+        # A session-bound copy without a SELECT; changes to it are saved as usual
+        return db.merge(cached, load=False)
+
+    user = db.query(models.User).filter(models.User.email == email).first()
+    if user is not None:
+        user_cache.set(email, detached_copy(user))
+    return user
+
+
+def detached_copy(user: models.User) -> models.User:
+    """A copy of ``user`` that belongs to no session, so it can be shared between requests."""
+    copy = models.User(**{column.key: getattr(user, column.key) for column in inspect(models.User).column_attrs})
+    # Known to exist in the database, so merge(load=False) can attach it without a SELECT
+    make_transient_to_detached(copy)
+    return copy
+
+
+# Writes to users drop their cache entries once committed. Bulk query.update()/delete()
+# bypass these hooks; entries then expire after USER_CACHE_TTL.
+@event.listens_for(Session, "after_flush")
+def collect_changed_users(session, flush_context):
+    emails = session.info.setdefault("changed_user_emails", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, models.User):
+            history = inspect(obj).attrs.email.history
+            emails.update(email for email in (obj.email, *history.deleted) if email)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_changed_users(session):
+    emails = session.info.pop("changed_user_emails", None)
+    if emails:
+        user_cache.invalidate(*emails)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_changed_users(session):
+    session.info.pop("changed_user_emails", None)
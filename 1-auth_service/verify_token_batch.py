@@ -0,0 +1,63 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+
+# Run against a throwaway database so local data is not touched
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/verify_token_batch.db"
+os.environ["VERIFY_TOKENS_BATCH_LIMIT"] = "50"
+
+from fastapi.testclient import TestClient
+from jose import jwt
+import migrate
+import security
+from config import ALGORITHM, SECRET_KEY
+from main import app, create_access_token
+
+migrate.upgrade()
+client = TestClient(app)
+
+ALICE = create_access_token({"sub": "alice@hospital.com", "role": "admin"})
+BOB = create_access_token({"sub": "bob@hospital.com", "role": "user"})
+EXPIRED = jwt.encode(
+    {"sub": "carol@hospital.com", "role": "user", "exp": datetime.utcnow() - timedelta(minutes=1)},
+    SECRET_KEY, algorithm=ALGORITHM
+)
+FORGED = jwt.encode({"sub": "mallory@hospital.com", "role": "admin"}, "not-the-key", algorithm=ALGORITHM)
+
+def test_batch_results_in_order():
+    response = client.post("/verify-tokens", json={"tokens": [ALICE, EXPIRED, BOB, "garbage", FORGED, ALICE]})
+    assert response.status_code == 200, response.text
+    assert response.json()["results"] == [
+        {"valid": True, "email": "alice@hospital.com", "role": "admin"},
+        {"valid": False, "error": "Token has expired"},
+        {"valid": True, "email": "bob@hospital.com", "role": "user"},
+        {"valid": False, "error": "Invalid token"},
+        {"valid": False, "error": "Invalid token"},
+        {"valid": True, "email": "alice@hospital.com", "role": "admin"},
+    ]
+    assert client.post("/verify-tokens", json={"tokens": []}).json() == {"results": []}
+    assert client.post("/verify-tokens", json={"tokens": [ALICE] * 51}).status_code == 400
+    print("Per-token claims in request order: OK")
+
+def test_single_endpoint_unchanged():
+    response = client.post("/verify-token", headers={"Authorization": f"Bearer {BOB}"})
+    assert response.json() == {"valid": True, "email": "bob@hospital.com", "role": "user"}
+    assert client.post("/verify-token", headers={"Authorization": f"Bearer {FORGED}"}).status_code == 401
+    assert client.post("/verify-token").status_code == 401
+    print("/verify-token answers as before: OK")
+
+def test_decoded_once():
+    security.token_cache._entries.clear()
+    with mock.patch.object(security.jwt, "decode", wraps=jwt.decode) as decode:
+        client.post("/verify-tokens", json={"tokens": [ALICE, BOB, ALICE, FORGED, FORGED]})
+        client.post("/verify-token", headers={"Authorization": f"Bearer {ALICE}"})
+        client.post("/verify-tokens", json={"tokens": [BOB, FORGED]})
+    assert decode.call_count == 3
+    print("Each token decoded once across both endpoints: OK")
+
+if __name__ == "__main__":
+    test_batch_results_in_order()
+    test_single_endpoint_unchanged()
+    test_decoded_once()
+    print("Verification SUCCESS!")
@@ -0,0 +1,83 @@
+import os
+import tempfile
+
+# Run against a throwaway database so local data is not touched
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/verify_user_cache.db"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+import migrate
+import models
+from database import SessionLocal, engine
+from main import app, create_access_token
+from user_cache import load_user, user_cache
+
+migrate.upgrade()
+client = TestClient(app)
+
+user_selects = []
+
+@event.listens_for(engine, "before_cursor_execute")
+def count_user_selects(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement:
+        user_selects.append(statement)
+
+def me(email):
+    token = create_access_token({"sub": email, "role": "user"})
+    return client.get("/me", headers={"Authorization": f"Bearer {token}"})
+
+def test_me_is_served_from_cache():
+    response = client.post("/register", json={
+        "email": "alice@hospital.com", "full_name": "Alice", "password": "secret", "role": "user"
+    })
+    assert response.status_code == 200, response.text
+
+    del user_selects[:]
+    for _ in range(5):
+        response = me("alice@hospital.com")
+        assert response.status_code == 200
+        assert response.json()["full_name"] == "Alice"
+    assert len(user_selects) == 1
+    assert me("nobody@hospital.com").status_code == 401
+    print("5 /me calls -> 1 user SELECT: OK")
+
+def test_writes_invalidate():
+    db = SessionLocal()
+    user = load_user(db, "alice@hospital.com")
+    user.full_name = "Alice Wijaya"
+    db.commit()
+    db.close()
+    assert me("alice@hospital.com").json()["full_name"] == "Alice Wijaya"
+
+    # Rolled back changes leave the entry alone
+    db = SessionLocal()
+    user = load_user(db, "alice@hospital.com")
+    user.full_name = "Never saved"
+    db.flush()
+    db.rollback()
+    db.close()
+    del user_selects[:]
+    assert me("alice@hospital.com").json()["full_name"] == "Alice Wijaya"
+    assert user_selects == []
+
+    # A changed email drops the entry under the old one
+    db = SessionLocal()
+    db.query(models.User).filter(models.User.email == "alice@hospital.com").one().email = "alice.w@hospital.com"
+    db.commit()
+    db.close()
+    assert me("alice@hospital.com").status_code == 401
+    assert me("alice.w@hospital.com").json()["full_name"] == "Alice Wijaya"
+    print("Updates, rollbacks and email changes: OK")
+
+def test_hit_rate_metrics():
+    stats = client.get("/health").json()["user_cache"]
+    assert stats["hits"] > 0 and stats["invalidations"] >= 2
+    assert stats["hit_rate"] == round(stats["hits"] / (stats["hits"] + stats["misses"]), 4)
+    print("Hit-rate metrics on /health:", stats)
+
+if __name__ == "__main__":
+    user_cache.clear()
+    test_me_is_served_from_cache()
+    test_writes_invalidate()
+    test_hit_rate_metrics()
+    print("Verification SUCCESS!")
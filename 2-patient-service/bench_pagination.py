@@ -0,0 +1,66 @@
+"""
+Benchmark: OFFSET vs keyset (cursor) pagination deep into a large patients table.
+
+    python bench_pagination.py [rows]
+
+Builds a throwaway SQLite database (default 1,000,000 rows) and times fetching a
+100-row page at increasing depths. OFFSET cost grows with depth; keyset stays flat.
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_pagination.db"
+
+import migrate
+import models
+from database import engine, SessionLocal
+from pagination import encode_cursor, keyset_page
+
+PAGE_SIZE = 100
+REPEAT = 5
+
+def seed(rows):
+    migrate.upgrade()
+    raw = engine.raw_connection()
+    try:
+        raw.executemany(
+            "INSERT INTO patients (name, email, phone_number, gender, address) VALUES (?, ?, ?, ?, ?)",
+            ((f"Patient {i}", f"patient{i}@hospital.com", "0812", "F" if i % 2 else "M", "Jl. Merdeka")
+             for i in range(rows)),
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+def timed(fetch):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fetch()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main(rows):
+    print(f"Seeding {rows:,} patients...")
+    seed(rows)
+    db = SessionLocal()
+    print(f"{'depth':>10} {'offset':>10} {'keyset':>10}")
+    for depth in (0, 10_000, 100_000, rows // 2, rows - PAGE_SIZE):
+        def by_offset():
+            return db.query(models.Patient).order_by(models.Patient.patient_id).offset(depth).limit(PAGE_SIZE).all()
+
+        # The cursor a client would hold after paging down to `depth`
+        cursor = encode_cursor({"s": "patient_id", "k": depth}) if depth else ""
+
+        def by_keyset():
+            return keyset_page(db.query(models.Patient), models.Patient.patient_id, cursor, PAGE_SIZE)[0]
+
+        assert [p.patient_id for p in by_offset()] == [p.patient_id for p in by_keyset()]
+        print(f"{depth:>10,} {timed(by_offset):>8.2f}ms {timed(by_keyset):>8.2f}ms")
+        db.expunge_all()
+    db.close()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
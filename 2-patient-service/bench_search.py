@@ -0,0 +1,86 @@
+"""
+Benchmark: /patients/search (FTS5) vs a LIKE scan on a large patients table.
+
+    python bench_search.py [rows]
+
+Builds a throwaway SQLite database (default 1,000,000 rows), times the 0002
+migration that indexes the existing rows, then times a 20-row ranked page for
+a few front-desk queries against the same lookup done with LIKE '%...%'.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_search.db"
+
+from sqlalchemy import and_, or_
+import migrate
+import models
+from database import engine, SessionLocal
+from search import search_page, search_terms
+
+PAGE_SIZE = 20
+REPEAT = 5
+
+SYLLABLES = ["ba", "di", "san", "to", "so", "wi", "ja", "ya", "ku", "su", "ma", "har", "no", "pra", "ta",
+             "le", "ri", "na", "gu", "sa", "pu", "tri", "hen", "dra", "wa", "ti", "lim", "nu", "ro", "ho"]
+# A few thousand given names and surnames, like a real patient list
+FIRST = ["Budi", "Siti", "Andi", "Rina"] + [a.title() + b for a in SYLLABLES for b in SYLLABLES][:2000]
+LAST = ["Santoso", "Wijaya", "Kusuma", "Hartono"] + [
+    (a + b + c).title() for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES
+][:8000]
+STREETS = ["Merdeka", "Sudirman", "Thamrin", "Gatot Subroto", "Diponegoro", "Ahmad Yani", "Pemuda", "Veteran"]
+CITIES = ["Jakarta", "Bandung", "Surabaya", "Medan", "Semarang", "Makassar", "Yogyakarta", "Denpasar"]
+
+# The last one matches an eighth of the table: every hit is ranked, so it is the worst case
+QUERIES = ["budi santoso", "hartono", "harto", "0812 34", "081234567", "santoso gatot surabaya", "jakarta"]
+
+def seed(rows):
+    random.seed(1)
+    migrate.upgrade("0001")
+    raw = engine.raw_connection()
+    try:
+        raw.executemany(
+            "INSERT INTO patients (name, email, phone_number, gender, address) VALUES (?, ?, ?, ?, ?)",
+            ((f"{random.choice(FIRST)} {random.choice(LAST)} {i}", f"patient{i}@hospital.com",
+              f"08{random.randrange(10**9, 10**10)}", "F" if i % 2 else "M",
+              f"Jl. {random.choice(STREETS)} No. {i % 200}, {random.choice(CITIES)}")
+             for i in range(rows)),
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+def like_page(db, q):
+    # What a search without the index has to do: scan every row with LIKE
+    columns = [models.Patient.name, models.Patient.phone_number, models.Patient.address]
+    words = [or_(*[column.ilike(f"%{term}%") for column in columns]) for term in search_terms(q)]
+    return db.query(models.Patient).filter(and_(*words)).limit(PAGE_SIZE).all()
+
+def timed(fetch):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fetch()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main(rows):
+    print(f"Seeding {rows:,} patients...")
+    seed(rows)
+    start = time.perf_counter()
+    migrate.upgrade()
+    print(f"Indexing existing rows (migration 0002): {time.perf_counter() - start:.1f}s")
+
+    db = SessionLocal()
+    print(f"{'query':>22} {'fts':>10} {'like':>10}")
+    for q in QUERIES:
+        fts_ms = timed(lambda: search_page(db, models.Patient, models.Patient.patient_id, q, 0, PAGE_SIZE))
+        like_ms = timed(lambda: like_page(db, q))
+        print(f"{q!r:>22} {fts_ms:>8.2f}ms {like_ms:>8.2f}ms")
+    db.close()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,38 @@
+"""Baseline: the patients table the service used to create with create_all at startup
+
+Left alone if it already exists, so databases created before migrations were
+introduced can be upgraded in place.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("patients"):
+        return
+    op.create_table(
+        "patients",
+        sa.Column("patient_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("phone_number", sa.String(), nullable=False),
+        sa.Column("gender", sa.String(), nullable=False),
+        sa.Column("address", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("patient_id"),
+        sa.UniqueConstraint("email"),
+    )
+    op.create_index("ix_patients_patient_id", "patients", ["patient_id"])
+
+
+def downgrade():
+    op.drop_table("patients")
@@ -0,0 +1,72 @@
+"""Full-text search index over name, phone_number and address (see search.py)
+
+SQLite gets an external-content FTS5 table kept in sync by triggers; Postgres a
+generated, weighted tsvector column with a GIN index. Existing rows are indexed
+as part of the upgrade.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# name matches rank above phone_number, which ranks above address
+COLUMNS = ["name", "phone_number", "address"]
+WEIGHTS = ["A", "B", "C"]
+BM25 = "bm25(10.0, 5.0, 1.0)"
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    columns = ", ".join(COLUMNS)
+    new_values = ", ".join(f"new.{c}" for c in COLUMNS)
+    old_values = ", ".join(f"old.{c}" for c in COLUMNS)
+
+    if dialect == "sqlite":
+        op.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5({columns}, "
+            "content='patients', content_rowid='patient_id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS patients_fts_insert AFTER INSERT ON patients BEGIN "
+            f"INSERT INTO patients_fts(rowid, {columns}) VALUES (new.patient_id, {new_values}); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS patients_fts_delete AFTER DELETE ON patients BEGIN "
+            f"INSERT INTO patients_fts(patients_fts, rowid, {columns}) VALUES ('delete', old.patient_id, {old_values}); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS patients_fts_update AFTER UPDATE ON patients BEGIN "
+            f"INSERT INTO patients_fts(patients_fts, rowid, {columns}) VALUES ('delete', old.patient_id, {old_values}); "
+            f"INSERT INTO patients_fts(rowid, {columns}) VALUES (new.patient_id, {new_values}); END"
+        )
+        op.execute("INSERT INTO patients_fts(patients_fts) VALUES ('rebuild')")
+        op.execute(f"INSERT INTO patients_fts(patients_fts, rank) VALUES ('rank', '{BM25}')")
+
+    elif dialect == "postgresql":
+        vector = " || ".join(
+            f"setweight(to_tsvector('simple', coalesce({c}, '')), '{w}')" for c, w in zip(COLUMNS, WEIGHTS)
+        )
+        op.execute(
+            f"ALTER TABLE patients ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({vector}) STORED"
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS ix_patients_search_vector ON patients USING GIN (search_vector)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for trigger in ("insert", "delete", "update"):
+            op.execute(f"DROP TRIGGER IF EXISTS patients_fts_{trigger}")
+        op.execute("DROP TABLE IF EXISTS patients_fts")
+    elif dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_patients_search_vector")
+        op.execute("ALTER TABLE patients DROP COLUMN IF EXISTS search_vector")
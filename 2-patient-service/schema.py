@@ -1,4 +1,5 @@
 from pydantic import BaseModel, EmailStr
+from typing import List, Optional
 
 class PatientCreate(BaseModel):
     name: str
@@ -16,4 +17,11 @@ class PatientResponse(BaseModel):
     address: str
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PatientPage(BaseModel):
+    items: List[PatientResponse]
+    next_cursor: Optional[str] = None
+
+class PatientStats(BaseModel):
+    total: int
\ No newline at end of file
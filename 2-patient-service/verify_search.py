@@ -0,0 +1,70 @@
+import os
+import tempfile
+
+# Run against a throwaway database so local data is not touched
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/verify_search.db"
+
+from fastapi.testclient import TestClient
+import migrate
+import models
+from database import SessionLocal
+from main import app
+
+migrate.upgrade()
+client = TestClient(app)
+HEADERS = {"Authorization": "Bearer internal_bypass"}
+
+PATIENTS = [
+    ("Budi Santoso", "081234567890", "Jl. Merdeka No. 1, Jakarta"),
+    ("Siti Budiarti", "081398765432", "Jl. Sudirman No. 5, Bandung"),
+    ("Andi Wijaya", "085611112222", "Jl. Budi Utomo No. 9, Surabaya"),
+    ("Rina Kusuma", "081234500000", "Jl. Merdeka No. 20, Jakarta"),
+]
+
+def search(q, **params):
+    response = client.get("/patients/search", params={"q": q, **params}, headers=HEADERS)
+    assert response.status_code == 200, response.text
+    return [p["name"] for p in response.json()]
+
+def setup_test_data():
+    db = SessionLocal()
+    for i, (name, phone, address) in enumerate(PATIENTS):
+        db.add(models.Patient(
+            name=name, email=f"patient{i}@hospital.com", phone_number=phone, gender="F", address=address
+        ))
+    db.commit()
+    db.close()
+
+def test_ranked_prefix_search():
+    # Name matches outrank address matches; "budi" is also a prefix of "Budiarti"
+    assert search("budi") == ["Budi Santoso", "Siti Budiarti", "Andi Wijaya"]
+    assert search("jl merd jakarta") == ["Budi Santoso", "Rina Kusuma"]
+    assert search("0812345") == ["Budi Santoso", "Rina Kusuma"]
+    assert search("BUDI santoso") == ["Budi Santoso"]
+    assert search("budi", skip=1, limit=1) == ["Siti Budiarti"]
+    assert search("tidak ada") == []
+
+    response = client.get("/patients/search", params={"q": "  ;; "}, headers=HEADERS)
+    assert response.status_code == 400
+    print("Ranked prefix search: OK")
+
+def test_index_follows_writes():
+    db = SessionLocal()
+    patient = db.query(models.Patient).filter(models.Patient.name == "Rina Kusuma").one()
+    patient.name = "Rina Hartono"
+    db.commit()
+    assert search("kusuma") == []
+    assert search("hartono") == ["Rina Hartono"]
+
+    db.delete(patient)
+    db.commit()
+    db.close()
+    assert search("hartono") == []
+    assert search("jakarta") == ["Budi Santoso"]
+    print("Index follows create/update/delete: OK")
+
+if __name__ == "__main__":
+    setup_test_data()
+    test_ranked_prefix_search()
+    test_index_follows_writes()
+    print("Verification SUCCESS!")
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import tempfile
+
+# Run against a throwaway database, and without the shared key so every check goes to the auth service
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/verify_token_client.db"
+os.environ["JWT_SECRET_KEY"] = ""
+
+import httpx
+from fastapi import FastAPI, Header, HTTPException
+import migrate
+import token_verifier
+from main import app
+
+migrate.upgrade()
+
+# Stand-in auth service that counts the checks it is asked for
+auth = FastAPI()
+checks = []
+
+@auth.post("/verify-token")
+async def verify_token(authorization: str = Header(None)):
+    token = authorization.split(" ")[1]
+    checks.append(token)
+    await asyncio.sleep(0.1)
+    if token.startswith("bad"):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return {"valid": True, "email": f"{token}@hospital.com", "role": "admin"}
+
+def use_auth(transport):
+    token_verifier.auth_client._client = httpx.AsyncClient(transport=transport, base_url="http://auth")
+    token_verifier.auth_client._loop = asyncio.get_running_loop()
+
+async def get_patients(service, token, count=1):
+    return await asyncio.gather(*(
+        service.get("/patients", headers={"Authorization": f"Bearer {token}"}) for _ in range(count)
+    ))
+
+async def test_concurrent_checks_are_coalesced(service):
+    responses = await get_patients(service, "alice", 30)
+    assert {r.status_code for r in responses} == {200}
+    assert checks == ["alice"]
+
+    # Verified claims are cached, later requests do not ask again
+    await get_patients(service, "alice", 5)
+    assert checks == ["alice"]
+
+    await asyncio.gather(get_patients(service, "bob", 10), get_patients(service, "carol", 10))
+    assert sorted(checks) == ["alice", "bob", "carol"]
+    print("Concurrent checks of one token -> 1 auth call: OK")
+
+async def test_rejections_are_shared(service):
+    del checks[:]
+    responses = await get_patients(service, "bad-token", 10)
+    assert {r.status_code for r in responses} == {401}
+    assert checks == ["bad-token"]
+    print("Rejected token -> 401 for every waiter: OK")
+
+async def test_auth_outage_is_503(service):
+    def refuse(request):
+        raise httpx.ConnectError("connection refused")
+
+    use_auth(httpx.MockTransport(refuse))
+    responses = await get_patients(service, "dave", 3)
+    assert {r.status_code for r in responses} == {503}
+    assert token_verifier._in_flight == {}
+    print("Auth service down -> 503, not 401: OK")
+
+async def run():
+    use_auth(httpx.ASGITransport(app=auth))
+    pool = token_verifier.auth_client.get()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://patients") as service:
+        await test_concurrent_checks_are_coalesced(service)
+        assert token_verifier.auth_client.get() is pool
+        await test_rejections_are_shared(service)
+        await test_auth_outage_is_503(service)
+    await token_verifier.auth_client.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(run())
+    print("Verification SUCCESS!")
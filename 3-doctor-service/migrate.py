@@ -0,0 +1,21 @@
+"""
+Bring the database at DATABASE_URL up to the latest migration.
+
+    python migrate.py              # upgrade to head
+    python migrate.py <revision>   # upgrade to a specific revision
+
+Runs before the app starts (see Dockerfile); the app itself never runs DDL.
+For anything else (downgrade, history, autogenerate) use the alembic CLI.
+"""
+import os
+import sys
+from alembic import command
+from alembic.config import Config
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+def upgrade(revision: str = "head"):
+    command.upgrade(Config(ALEMBIC_INI), revision)
+
+if __name__ == "__main__":
+    upgrade(sys.argv[1] if len(sys.argv) > 1 else "head")
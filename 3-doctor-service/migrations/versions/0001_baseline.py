@@ -0,0 +1,39 @@
+"""Baseline: the doctors table the service used to create with create_all at startup
+
+Left alone if it already exists, so databases created before migrations were
+introduced can be upgraded in place.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("doctors"):
+        return
+    op.create_table(
+        "doctors",
+        sa.Column("doctor_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("specialization", sa.String(), nullable=False),
+        sa.Column("phone_number", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("license_number", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("doctor_id"),
+        sa.UniqueConstraint("email"),
+        sa.UniqueConstraint("license_number"),
+    )
+    op.create_index("ix_doctors_doctor_id", "doctors", ["doctor_id"])
+
+
+def downgrade():
+    op.drop_table("doctors")
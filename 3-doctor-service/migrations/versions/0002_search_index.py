@@ -0,0 +1,72 @@
+"""Full-text search index over name, specialization and phone_number (see search.py)
+
+SQLite gets an external-content FTS5 table kept in sync by triggers; Postgres a
+generated, weighted tsvector column with a GIN index. Existing rows are indexed
+as part of the upgrade.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+# name matches rank above specialization, which ranks above phone_number
+COLUMNS = ["name", "specialization", "phone_number"]
+WEIGHTS = ["A", "B", "C"]
+BM25 = "bm25(10.0, 5.0, 1.0)"
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    columns = ", ".join(COLUMNS)
+    new_values = ", ".join(f"new.{c}" for c in COLUMNS)
+    old_values = ", ".join(f"old.{c}" for c in COLUMNS)
+
+    if dialect == "sqlite":
+        op.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS doctors_fts USING fts5({columns}, "
+            "content='doctors', content_rowid='doctor_id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS doctors_fts_insert AFTER INSERT ON doctors BEGIN "
+            f"INSERT INTO doctors_fts(rowid, {columns}) VALUES (new.doctor_id, {new_values}); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS doctors_fts_delete AFTER DELETE ON doctors BEGIN "
+            f"INSERT INTO doctors_fts(doctors_fts, rowid, {columns}) VALUES ('delete', old.doctor_id, {old_values}); END"
+        )
+        op.execute(
+            "CREATE TRIGGER IF NOT EXISTS doctors_fts_update AFTER UPDATE ON doctors BEGIN "
+            f"INSERT INTO doctors_fts(doctors_fts, rowid, {columns}) VALUES ('delete', old.doctor_id, {old_values}); "
+            f"INSERT INTO doctors_fts(rowid, {columns}) VALUES (new.doctor_id, {new_values}); END"
+        )
+        op.execute("INSERT INTO doctors_fts(doctors_fts) VALUES ('rebuild')")
+        op.execute(f"INSERT INTO doctors_fts(doctors_fts, rank) VALUES ('rank', '{BM25}')")
+
+    elif dialect == "postgresql":
+        vector = " || ".join(
+            f"setweight(to_tsvector('simple', coalesce({c}, '')), '{w}')" for c, w in zip(COLUMNS, WEIGHTS)
+        )
+        op.execute(
+            f"ALTER TABLE doctors ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({vector}) STORED"
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS ix_doctors_search_vector ON doctors USING GIN (search_vector)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for trigger in ("insert", "delete", "update"):
+            op.execute(f"DROP TRIGGER IF EXISTS doctors_fts_{trigger}")
+        op.execute("DROP TABLE IF EXISTS doctors_fts")
+    elif dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_doctors_search_vector")
+        op.execute("ALTER TABLE doctors DROP COLUMN IF EXISTS search_vector")
@@ -1,4 +1,5 @@
 from pydantic import BaseModel, EmailStr
+from typing import List, Optional
 
 class DoctorCreate(BaseModel):
     name: str
@@ -16,4 +17,11 @@ class DoctorResponse(BaseModel):
     license_number: str
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class DoctorPage(BaseModel):
+    items: List[DoctorResponse]
+    next_cursor: Optional[str] = None
+
+class DoctorStats(BaseModel):
+    total: int
\ No newline at end of file
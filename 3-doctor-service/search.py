@@ -0,0 +1,60 @@
+import re
+from fastapi import HTTPException
+from sqlalchemy import column, func, literal_column, select, table
+
+# Full-text index per searchable table, created by the migrations:
+#   SQLite:   FTS5 table "<table>_fts" (external content, rowid = primary key),
+#             kept in sync by triggers, ranked by its configured bm25 weights
+#   Postgres: generated tsvector column "search_vector" with a GIN index
+# Either way every write path (ORM, bulk SQL, other clients) updates the index.
+SEARCH_VECTOR = "search_vector"
+
+WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(q: str):
+    terms = [term.lower() for term in WORD.findall(q or "")]
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query must contain a letter or digit")
+    return terms
+
+
+def search_statement(model, key_column, q: str, dialect: str, skip: int, limit: int):
+    """SELECT one page of ``model`` rows matching every word of ``q`` as a prefix, best match first.
+
+    "budi jl mer" finds "Budi Santoso, Jl. Merdeka No. 1"; "0812" finds phone
+    numbers starting with it.
+    """
+    terms = search_terms(q)
+    name = model.__tablename__
+
+    if dialect == "sqlite":
+        fts = table(f"{name}_fts", column("rowid"), column("rank"))
+        match = " ".join(f'"{term}"*' for term in terms)
+        # Rank and cut the page inside the FTS table, then fetch only those rows
+        hits = (
+            select(fts.c.rowid, fts.c.rank)
+            .where(literal_column(fts.name).op("MATCH")(match))
+            .order_by(fts.c.rank, fts.c.rowid)
+            .offset(skip)
+            .limit(limit)
+            .subquery()
+        )
+        return select(model).join(hits, hits.c.rowid == key_column).order_by(hits.c.rank, key_column)
+
+    if dialect == "postgresql":
+        vector = literal_column(f"{name}.{SEARCH_VECTOR}")
+        query = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+        return (
+            select(model)
+            .where(vector.op("@@")(query))
+            .order_by(func.ts_rank(vector, query).desc(), key_column)
+            .offset(skip)
+            .limit(limit)
+        )
+
+    raise HTTPException(status_code=501, detail=f"Search is not available on {dialect}")
+
+
+def search_page(db, model, key_column, q: str, skip: int, limit: int):
+    return db.scalars(search_statement(model, key_column, q, db.get_bind().dialect.name, skip, limit)).all()
@@ -0,0 +1,155 @@
+"""
+Benchmark: sync Session vs AsyncSession prescription endpoints under concurrent load.
+
+    python bench_async.py [seconds] [concurrency ...]
+
+Drives the real (async) app and a sync twin of its detail/create handlers
+in-process through httpx, with 4 reads of GET /prescriptions/{id} to every
+POST /prescriptions. Sync handlers each hold one of the threadpool's 40 slots for
+the whole request, so anything past 40 in-flight requests queues for a thread;
+async handlers only hold a pooled connection while a statement runs.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+TMP = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP}/bench_async.db"
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException, Response
+from sqlalchemy.orm import Session, selectinload, sessionmaker
+
+import migrate
+import models, schema
+from database import SessionLocal, create_db_engine
+from main import app as async_app
+
+migrate.upgrade()
+
+# The sync twin gets its own file so a stalled run cannot hold locks on the other
+sync_engine = create_db_engine(f"sqlite:///{TMP}/bench_sync.db")
+SyncSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+models.Base.metadata.create_all(bind=sync_engine)
+
+def get_db():
+    db = SyncSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+sync_app = FastAPI()
+
+# Same statements as the async handlers in main.py, on a sync Session
+@sync_app.get("/prescriptions/{id}", response_model=schema.PrescriptionResponse)
+def get_one_prescription(id: int, response: Response, db: Session = Depends(get_db)):
+    version = db.query(models.Prescription.version).filter(models.Prescription.id == id).scalar()
+    if version is None:
+        raise HTTPException(status_code=404, detail="Prescription not found")
+    response.headers["ETag"] = f'"prescription-{id}-{version}"'
+    return (
+        db.query(models.Prescription)
+        .options(selectinload(models.Prescription.items))
+        .filter(models.Prescription.id == id)
+        .first()
+    )
+
+@sync_app.post("/prescriptions", response_model=schema.PrescriptionResponse)
+def create_prescription(prescription: schema.PrescriptionCreate, db: Session = Depends(get_db)):
+    db_prescription = models.Prescription(
+        patientName=prescription.patientName,
+        doctorName=prescription.doctorName,
+        status=prescription.status
+    )
+    db.add(db_prescription)
+    db.commit()
+    for item in prescription.items:
+        db.add(models.PrescriptionItem(
+            prescription_id=db_prescription.id,
+            medicine_id=item.medicineId,
+            medicine_name=item.medicineName,
+            quantity=item.quantity,
+            instructions=item.instructions
+        ))
+    db.commit()
+    return (
+        db.query(models.Prescription)
+        .options(selectinload(models.Prescription.items))
+        .filter(models.Prescription.id == db_prescription.id)
+        .populate_existing()
+        .first()
+    )
+
+PRESCRIPTIONS = 500
+BODY = {
+    "patientName": "Bench Patient",
+    "doctorName": "Dr. Bench",
+    "items": [{"medicineId": 1, "medicineName": "Paracetamol", "quantity": 10, "instructions": "After meal"}],
+}
+
+def seed(session_factory):
+    with session_factory() as db:
+        for i in range(PRESCRIPTIONS):
+            db.add(models.Prescription(patientName=f"Patient {i}", doctorName="Dr. Smith", items=[
+                models.PrescriptionItem(medicine_id=j, medicine_name=f"Medicine {j}", quantity=1) for j in range(3)
+            ]))
+        db.commit()
+
+async def load(app, seconds, concurrency):
+    latencies, errors, peak_threads = [], 0, threading.active_count()
+    # App errors (e.g. pool checkout timeouts) come back as 500s and are counted
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        stop = started + seconds
+
+        async def worker(n):
+            nonlocal errors, peak_threads
+            i = n
+            while time.perf_counter() < stop:
+                start = time.perf_counter()
+                if i % 5 == 0:
+                    response = await client.post("/prescriptions", json=BODY)
+                else:
+                    response = await client.get(f"/prescriptions/{i % PRESCRIPTIONS + 1}")
+                if response.status_code == 200:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+                peak_threads = max(peak_threads, threading.active_count())
+                i += concurrency
+
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    if not latencies:
+        return 0, float("nan"), float("nan"), errors, peak_threads
+    latencies.sort()
+    p = lambda pct: latencies[min(len(latencies) - 1, int(len(latencies) * pct))] * 1000
+    return len(latencies) / elapsed, p(0.5), p(0.99), errors, peak_threads
+
+def run_one(name, seconds, concurrency):
+    seed(SessionLocal if name == "async" else SyncSessionLocal)
+    app = async_app if name == "async" else sync_app
+    rps, p50, p99, errors, threads = asyncio.run(load(app, seconds, concurrency))
+    print(f"{name:>6} {concurrency:>5} {rps:>8.0f} {p50:>7.1f}ms {p99:>7.1f}ms {errors:>7} {threads:>8}", flush=True)
+
+def main(seconds, levels):
+    print(f"{seconds}s per run, 4:1 GET detail / POST create, {PRESCRIPTIONS} seeded prescriptions")
+    print(f"{'app':>6} {'conc':>5} {'req/s':>8} {'p50':>9} {'p99':>9} {'errors':>7} {'threads':>8}", flush=True)
+    for concurrency in levels:
+        for name in ("sync", "async"):
+            # A fresh process (and database) per run: a stalled sync run leaves
+            # blocked threads behind that would skew whatever runs next
+            subprocess.run([sys.executable, __file__, "--run", name, str(seconds), str(concurrency)], check=True)
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        run_one(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+    else:
+        seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+        main(seconds, [int(c) for c in sys.argv[2:]] or [10, 50, 200, 500])
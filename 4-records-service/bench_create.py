@@ -0,0 +1,87 @@
+"""
+Benchmark: prescription creation throughput.
+
+    python bench_create.py [prescriptions] [batch_size]
+
+Compares, on a throwaway SQLite database:
+  two-commit  - the previous create flow: commit the header, add items, commit, reload
+  single      - POST /prescriptions: one transaction, items in one executemany
+  batch       - POST /prescriptions/batch with `batch_size` prescriptions per request
+Every prescription has 3 items.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_create.db"
+
+import httpx
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import migrate
+import models, schema
+from database import get_async_db
+from main import app, load_prescription
+
+migrate.upgrade()
+
+@app.post("/bench/two-commit", response_model=schema.PrescriptionResponse)
+async def create_two_commit(prescription: schema.PrescriptionCreate, db: AsyncSession = Depends(get_async_db)):
+    db_prescription = models.Prescription(
+        patientName=prescription.patientName,
+        doctorName=prescription.doctorName,
+        status=prescription.status
+    )
+    db.add(db_prescription)
+    await db.commit()
+    for item in prescription.items:
+        db.add(models.PrescriptionItem(
+            prescription_id=db_prescription.id,
+            medicine_id=item.medicineId,
+            medicine_name=item.medicineName,
+            quantity=item.quantity,
+            instructions=item.instructions
+        ))
+    await db.commit()
+    return await load_prescription(db, db_prescription.id)
+
+def prescription(i):
+    return {
+        "patientName": f"Patient {i}",
+        "doctorName": "Dr. Bench",
+        "items": [
+            {"medicineId": j, "medicineName": f"Medicine {j}", "quantity": j + 1, "instructions": "After meal"}
+            for j in range(3)
+        ],
+    }
+
+async def main(total, batch_size):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def two_commit():
+            for i in range(total):
+                (await client.post("/bench/two-commit", json=prescription(i))).raise_for_status()
+
+        async def single():
+            for i in range(total):
+                (await client.post("/prescriptions", json=prescription(i))).raise_for_status()
+
+        async def batch():
+            for start in range(0, total, batch_size):
+                body = {"prescriptions": [prescription(i) for i in range(start, min(total, start + batch_size))]}
+                (await client.post("/prescriptions/batch", json=body)).raise_for_status()
+
+        print(f"{total} prescriptions x 3 items, batch size {batch_size}")
+        for name, run in (("two-commit", two_commit), ("single", single), ("batch", batch)):
+            start = time.perf_counter()
+            await run()
+            elapsed = time.perf_counter() - start
+            print(f"{name:>10} {total / elapsed:>8.0f} prescriptions/s  ({elapsed:.2f}s)")
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    asyncio.run(main(total, batch_size))
@@ -0,0 +1,111 @@
+"""
+Benchmark: filtered queries before and after the index migrations (0003, 0004).
+
+    python bench_indexes.py [prescriptions] [repeats]
+
+Seeds a throwaway SQLite database at revision 0002 (no filter indexes) with
+`prescriptions` prescriptions (3 items each) and as many medical records, times
+the queries the endpoints run, upgrades to head and times them again.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench_indexes.db"
+
+from sqlalchemy import insert, text
+import migrate
+import models
+from database import engine
+
+STATUSES = ["pending"] * 90 + ["processing"] * 9 + ["completed"]
+
+QUERIES = {
+    "status filter": (
+        "SELECT id FROM prescriptions WHERE status = :status ORDER BY id DESC LIMIT 50",
+        lambda n: {"status": "completed"},
+    ),
+    "patientName lookup": (
+        'SELECT id FROM prescriptions WHERE "patientName" = :name',
+        lambda n: {"name": f"Patient {random.randrange(n // 10)}"},
+    ),
+    "pending queue": (
+        'SELECT id FROM prescriptions WHERE status = :status ORDER BY "createdAt", id LIMIT 50',
+        lambda n: {"status": "pending"},
+    ),
+    "doctorName lookup": (
+        'SELECT id FROM prescriptions WHERE "doctorName" = :name',
+        lambda n: {"name": f"Dr. {random.randrange(n // 100)}"},
+    ),
+    "medicine_id filter": (
+        "SELECT id FROM prescriptions WHERE id IN "
+        "(SELECT prescription_id FROM prescription_items WHERE medicine_id = :medicine_id)",
+        lambda n: {"medicine_id": random.randrange(n // 10)},
+    ),
+    "items for a page": (
+        "SELECT * FROM prescription_items WHERE prescription_id IN ({})".format(
+            ", ".join(f":p{i}" for i in range(50))
+        ),
+        lambda n: {f"p{i}": random.randrange(1, n + 1) for i in range(50)},
+    ),
+    "records by patient": (
+        "SELECT * FROM medical_records WHERE patient_id = :patient_id",
+        lambda n: {"patient_id": random.randrange(n // 10)},
+    ),
+    "records by doctor": (
+        "SELECT COUNT(*) FROM medical_records WHERE doctor_id = :doctor_id",
+        lambda n: {"doctor_id": random.randrange(50)},
+    ),
+}
+
+def seed(total):
+    random.seed(1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Prescription), [
+            {"id": i, "patientName": f"Patient {random.randrange(total // 10)}",
+             "doctorName": f"Dr. {random.randrange(total // 100)}", "status": random.choice(STATUSES),
+             "createdAt": datetime(2024, i % 12 + 1, i % 28 + 1, i % 24), "version": 1}
+            for i in range(1, total + 1)
+        ])
+        conn.execute(insert(models.PrescriptionItem), [
+            {"prescription_id": i, "medicine_id": random.randrange(total // 10), "medicine_name": "Medicine",
+             "quantity": 1}
+            for i in range(1, total + 1)
+            for j in range(3)
+        ])
+        conn.execute(insert(models.MedicalRecord), [
+            {"patient_id": random.randrange(total // 10), "doctor_id": random.randrange(50), "diagnosis": "Bench"}
+            for _ in range(total)
+        ])
+
+def run(total, repeats):
+    results = {}
+    with engine.connect() as conn:
+        for name, (sql, params) in QUERIES.items():
+            random.seed(2)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                conn.execute(text(sql), params(total)).all()
+            elapsed = (time.perf_counter() - start) / repeats * 1000
+            plan = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params(total)).all()
+            results[name] = (elapsed, "; ".join(row[-1] for row in plan))
+    return results
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    migrate.upgrade("0002")
+    seed(total)
+    before = run(total, repeats)
+    migrate.upgrade()
+    # Pooled connections keep prepared statements planned against the old schema
+    engine.dispose()
+    after = run(total, repeats)
+
+    print(f"{total} prescriptions, {total * 3} items, {total} medical records; mean of {repeats} runs")
+    for name in QUERIES:
+        print(f"{name:>20} {before[name][0]:>9.3f} ms -> {after[name][0]:>7.3f} ms  ({after[name][1]})")
@@ -0,0 +1,104 @@
+"""
+Benchmark: concurrent reads and writes against SQLite, default engine vs create_db_engine.
+
+    python bench_sqlite.py [seconds] [writers] [readers]
+
+Each engine gets its own throwaway database seeded with medical records. Writer
+threads insert one record per transaction while reader threads page through the
+latest records. The default engine runs in rollback-journal mode with a 5s lock
+wait, so readers and writers serialise on the file lock; the tuned engine (WAL,
+synchronous=NORMAL, busy_timeout) lets readers run alongside the writer.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+TMP = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP}/bench_sqlite.db"
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.exc import OperationalError
+
+import models
+from database import create_db_engine
+
+SEED_ROWS = 50_000
+records = models.MedicalRecord.__table__
+
+def seed(engine):
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(records), [
+            {"patient_id": i % 500, "doctor_id": i % 50, "diagnosis": f"Diagnosis {i}"}
+            for i in range(SEED_ROWS)
+        ])
+
+def percentile(samples, pct):
+    if not samples:
+        return float("nan")
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct))] * 1000
+
+def run(engine, seconds, writers, readers):
+    stop = time.perf_counter() + seconds
+    lock = threading.Lock()
+    stats = {"write": [], "read": [], "errors": 0}
+
+    def writer(n):
+        i = 0
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(records).values(patient_id=n, doctor_id=i % 50, diagnosis="Follow-up"))
+            except OperationalError:
+                with lock:
+                    stats["errors"] += 1
+                continue
+            with lock:
+                stats["write"].append(time.perf_counter() - start)
+            i += 1
+
+    def reader(n):
+        query = select(records).where(records.c.patient_id == n % 500).order_by(records.c.record_id.desc()).limit(50)
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    conn.execute(query).all()
+                    conn.execute(select(func.count()).select_from(records)).scalar()
+            except OperationalError:
+                with lock:
+                    stats["errors"] += 1
+                continue
+            with lock:
+                stats["read"].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats
+
+def main(seconds, writers, readers):
+    engines = {
+        # What every service used before create_db_engine
+        "default": create_engine(f"sqlite:///{TMP}/default.db", connect_args={"check_same_thread": False}),
+        "tuned": create_db_engine(f"sqlite:///{TMP}/tuned.db"),
+    }
+    print(f"{seconds}s, {writers} writers, {readers} readers, {SEED_ROWS:,} seeded records")
+    print(f"{'engine':>8} {'writes/s':>9} {'w p99':>9} {'reads/s':>9} {'r p99':>9} {'errors':>7}")
+    for name, engine in engines.items():
+        seed(engine)
+        stats = run(engine, seconds, writers, readers)
+        print(f"{name:>8} {len(stats['write']) / seconds:>9.0f} {percentile(stats['write'], 0.99):>7.1f}ms "
+              f"{len(stats['read']) / seconds:>9.0f} {percentile(stats['read'], 0.99):>7.1f}ms {stats['errors']:>7}")
+        engine.dispose()
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:]]
+    main(*(args + [10, 4, 8][len(args):]))
@@ -0,0 +1,167 @@
+import asyncio
+from sqlalchemy import event, func, insert, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+import models
+
+
+class ChangeNotifier:
+    """Wakes change-feed listeners after prescription events are committed.
+
+    Commits from sync sessions happen on threadpool threads, so notify() hops
+    onto the event loop that the listeners are waiting on.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._event = None
+
+    def listener(self) -> asyncio.Event:
+        # Grab this *before* reading the log so a commit in between is not missed
+        if self._event is None:
+            self._loop = asyncio.get_running_loop()
+            self._event = asyncio.Event()
+        return self._event
+
+    def _wake(self):
+        self._event.set()
+        self._event = asyncio.Event()
+
+    def notify(self):
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake)
+
+    async def wait(self, listener: asyncio.Event, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(listener.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+notifier = ChangeNotifier()
+
+
+def collect_events(session: Session) -> dict:
+    events = {}
+    for obj in session.deleted:
+        if isinstance(obj, models.Prescription):
+            events[obj.id] = ("deleted", obj.status)
+    for obj in session.new:
+        if isinstance(obj, models.Prescription):
+            events.setdefault(obj.id, ("created", obj.status))
+    for obj in session.dirty:
+        if isinstance(obj, models.Prescription) and session.is_modified(obj, include_collections=False):
+            status_changed = inspect(obj).attrs.status.history.has_changes()
+            events.setdefault(obj.id, ("status" if status_changed else "updated", obj.status))
+    # Item changes surface as an update of their prescription
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, models.PrescriptionItem) and obj.prescription_id is not None:
+            events.setdefault(obj.prescription_id, ("updated", None))
+    return events
+
+
+def touched_prescriptions(session: Session) -> set:
+    touched = set()
+    for obj in session.dirty:
+        # include_collections: adding/removing items counts as a change too
+        if isinstance(obj, models.Prescription) and session.is_modified(obj):
+            touched.add(obj)
+    with session.no_autoflush:
+        for obj in session.new | session.dirty:
+            if isinstance(obj, models.PrescriptionItem):
+                parent = obj.prescription
+                if parent is None and obj.prescription_id is not None:
+                    parent = session.get(models.Prescription, obj.prescription_id)
+                if parent is not None:
+                    touched.add(parent)
+    return {obj for obj in touched if obj not in session.new and obj not in session.deleted}
+
+
+# Registered on Session itself: AsyncSession drives a plain Session underneath,
+# so async commits go through the same hooks.
+@event.listens_for(Session, "before_flush")
+def bump_prescription_versions(session, flush_context, instances):
+    # Versions back the detail ETags; onupdate refreshes updatedAt in the same UPDATE
+    for prescription in touched_prescriptions(session):
+        prescription.version = (prescription.version or 0) + 1
+
+
+# Cursors are event ids, so ids must become visible in order. Postgres hands out
+# SERIAL ids at insert time: T1 takes 10, T2 takes 11 and commits first, a poller
+# moves to 11 and never sees 10. Event writers therefore queue on this
+# transaction-scoped advisory lock, drawing ids only once the previous writer has
+# committed or rolled back. SQLite needs nothing: it has one writer at a time,
+# holding its lock until commit.
+EVENTS_LOCK_ID = 0x70726573  # arbitrary, reserved for prescription_events
+
+
+def insert_events(session: Session, events: dict):
+    """Append ``{prescription_id: (kind, status)}`` to the log; listeners wake on commit.
+
+    Also used directly by bulk SQL writes, which bypass the flush hooks below.
+    """
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        connection.execute(select(func.pg_advisory_xact_lock(EVENTS_LOCK_ID)))
+    connection.execute(
+        insert(models.PrescriptionEvent),
+        [
+            {"prescription_id": prescription_id, "event": kind, "status": status}
+            for prescription_id, (kind, status) in events.items()
+        ],
+    )
+    session.info["prescription_events"] = True
+
+
+@event.listens_for(Session, "after_flush")
+def record_prescription_events(session, flush_context):
+    # new/dirty/deleted still describe the flushed changes at this point
+    events = collect_events(session)
+    if events:
+        insert_events(session, events)
+
+
+@event.listens_for(Session, "after_commit")
+def notify_prescription_events(session):
+    if session.info.pop("prescription_events", False):
+        notifier.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_prescription_events(session):
+    session.info.pop("prescription_events", None)
+
+
+async def latest_cursor(db: AsyncSession) -> int:
+    return await db.scalar(select(func.max(models.PrescriptionEvent.id))) or 0
+
+
+async def fetch_events(db: AsyncSession, cursor: int, limit: int = 100):
+    result = await db.scalars(
+        select(models.PrescriptionEvent)
+        .where(models.PrescriptionEvent.id > cursor)
+        .order_by(models.PrescriptionEvent.id)
+        .limit(limit)
+    )
+    return result.all()
+
+
+async def changed_since(db: AsyncSession, cursor: int, limit: int = 100):
+    """Prescription ids changed after ``cursor``, oldest first, plus the next cursor.
+
+    Grouping by each prescription's latest event means a row left out of this
+    page always has a newer event than the returned cursor, so it is never lost.
+    """
+    latest = func.max(models.PrescriptionEvent.id)
+    result = await db.execute(
+        select(models.PrescriptionEvent.prescription_id, latest)
+        .where(models.PrescriptionEvent.id > cursor)
+        .group_by(models.PrescriptionEvent.prescription_id)
+        .order_by(latest)
+        .limit(limit)
+    )
+    rows = result.all()
+    if not rows:
+        return [], cursor
+    return [prescription_id for prescription_id, _ in rows], rows[-1][1]
@@ -3,4 +3,47 @@ import os
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
     "sqlite:///./records.db"
-)
\ No newline at end of file
+)
+
+# Engine tuning (see database.create_db_engine)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+
+AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://localhost:8001")
+# Remote token checks share one connection pool and give up quickly
+AUTH_MAX_CONNECTIONS = int(os.getenv("AUTH_MAX_CONNECTIONS", "50"))
+AUTH_CONNECT_TIMEOUT = float(os.getenv("AUTH_CONNECT_TIMEOUT", "1"))
+AUTH_TIMEOUT = float(os.getenv("AUTH_TIMEOUT", "3"))
+
+# Same key material as the auth service, so tokens can be verified locally.
+# Leave empty to always ask the auth service.
+JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+
+# Shared with the gateway: requests carrying an X-Gateway-Identity header signed with
+# it were already authenticated there. Leave empty to ignore the header.
+GATEWAY_IDENTITY_SECRET = os.getenv("GATEWAY_IDENTITY_SECRET", "")
+
+# Change feed: SSE heartbeat must stay below the gateway's upstream read timeout
+FEED_HEARTBEAT_SECONDS = float(os.getenv("FEED_HEARTBEAT_SECONDS", "15"))
+FEED_MAX_WAIT_SECONDS = float(os.getenv("FEED_MAX_WAIT_SECONDS", "30"))
+
+# GraphQL: parsed/validated document caches, automatic persisted queries and
+# limits checked before execution
+GRAPHQL_DOCUMENT_CACHE_SIZE = int(os.getenv("GRAPHQL_DOCUMENT_CACHE_SIZE", "1000"))
+GRAPHQL_PERSISTED_QUERIES_SIZE = int(os.getenv("GRAPHQL_PERSISTED_QUERIES_SIZE", "1000"))
+GRAPHQL_MAX_DEPTH = int(os.getenv("GRAPHQL_MAX_DEPTH", "10"))
+GRAPHQL_MAX_ALIASES = int(os.getenv("GRAPHQL_MAX_ALIASES", "100"))
+GRAPHQL_MAX_COST = int(os.getenv("GRAPHQL_MAX_COST", "5000"))
+GRAPHQL_LIST_COST_FACTOR = int(os.getenv("GRAPHQL_LIST_COST_FACTOR", "10"))
+
+# Largest number of prescriptions one bulk request may touch
+PRESCRIPTION_BATCH_LIMIT = int(os.getenv("PRESCRIPTION_BATCH_LIMIT", "1000"))
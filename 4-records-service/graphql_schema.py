@@ -1,10 +1,25 @@
 
+import asyncio
 import strawberry
+from collections import defaultdict
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from strawberry.dataloader import DataLoader
+from strawberry.extensions import MaxAliasesLimiter, ParserCache, QueryDepthLimiter, ValidationCache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Depends
 from database import get_db
 import models
+import prescription_batch
+from config import (
+    GRAPHQL_DOCUMENT_CACHE_SIZE,
+    GRAPHQL_MAX_DEPTH,
+    GRAPHQL_MAX_ALIASES,
+    GRAPHQL_MAX_COST,
+    GRAPHQL_LIST_COST_FACTOR,
+    PRESCRIPTION_BATCH_LIMIT,
+)
+from query_cost import QueryCostLimiter
 
 @strawberry.type
 class MedicineItem:
@@ -16,22 +31,50 @@ class PrescriptionResult:
     isValid: bool
     patientName: Optional[str]
     medicines: Optional[List[MedicineItem]]
+    id: Optional[str] = None
 
-def get_prescription_validation(id: str, db: Session) -> PrescriptionResult:
+def create_loaders(db: AsyncSession) -> dict:
+    """Per-request DataLoaders, so every validatePrescription in one document
+    shares one prescriptions query and one items query."""
+
+    async def load_prescriptions(ids: List[int]) -> List[Optional[models.Prescription]]:
+        rows = await db.scalars(select(models.Prescription).where(models.Prescription.id.in_(ids)))
+        by_id = {p.id: p for p in rows}
+        return [by_id.get(i) for i in ids]
+
+    async def load_items(ids: List[int]) -> List[List[models.PrescriptionItem]]:
+        rows = await db.scalars(
+            select(models.PrescriptionItem)
+            .where(models.PrescriptionItem.prescription_id.in_(ids))
+            .order_by(models.PrescriptionItem.id)
+        )
+        by_prescription = defaultdict(list)
+        for item in rows:
+            by_prescription[item.prescription_id].append(item)
+        return [by_prescription[i] for i in ids]
+
+    return {
+        "prescriptions": DataLoader(load_fn=load_prescriptions),
+        "items": DataLoader(load_fn=load_items),
+    }
+
+async def get_prescription_validation(id: str, loaders: dict) -> PrescriptionResult:
     # Try to find the prescription by ID
     try:
         # Assuming ID passed is convertible to int as per database model
         print(f"Validating prescription id: {id}") # Debug log
         prescription_id = int(id)
         
-        prescription = db.query(models.Prescription).filter(models.Prescription.id == prescription_id).first()
+        # Awaited one after the other: both loaders share the request's AsyncSession,
+        # which cannot run two queries at once
+        prescription = await loaders["prescriptions"].load(prescription_id)
         
         if not prescription:
-            return PrescriptionResult(isValid=False, patientName=None, medicines=None)
+            return PrescriptionResult(isValid=False, patientName=None, medicines=None, id=id)
         
         # Convert items
         medicine_items = []
-        for item in prescription.items:
+        for item in await loaders["items"].load(prescription_id):
             medicine_items.append(
                 MedicineItem(
                     name=item.medicineName,
@@ -42,33 +85,33 @@ def get_prescription_validation(id: str, db: Session) -> PrescriptionResult:
         return PrescriptionResult(
             isValid=True,
             patientName=prescription.patientName,
-            medicines=medicine_items
+            medicines=medicine_items,
+            id=id
         )
             
     except ValueError:
         # If id cannot be converted to int
-        return PrescriptionResult(isValid=False, patientName=None, medicines=None)
+        return PrescriptionResult(isValid=False, patientName=None, medicines=None, id=id)
     except Exception as e:
         print(f"Error validating prescription: {e}")
-        return PrescriptionResult(isValid=False, patientName=None, medicines=None)
+        return PrescriptionResult(isValid=False, patientName=None, medicines=None, id=id)
 
 @strawberry.type
 class PrescriptionUpdateResult:
     success: bool
     message: str
 
-def update_prescription_status(id: str, status: str, db: Session) -> PrescriptionUpdateResult:
+async def update_prescription_status(id: str, status: str, db: AsyncSession) -> PrescriptionUpdateResult:
     try:
         print(f"Updating prescription id: {id} to status: {status}")
         prescription_id = int(id)
-        prescription = db.query(models.Prescription).filter(models.Prescription.id == prescription_id).first()
+        prescription = await db.get(models.Prescription, prescription_id)
         
         if not prescription:
             return PrescriptionUpdateResult(success=False, message="Prescription not found")
         
         prescription.status = status
-        db.commit()
-        db.refresh(prescription)
+        await db.commit()
         
         return PrescriptionUpdateResult(success=True, message=f"Status updated to {status}")
     except ValueError:
@@ -77,18 +120,84 @@ def update_prescription_status(id: str, status: str, db: Session) -> Prescriptio
         print(f"Error updating prescription: {e}")
         return PrescriptionUpdateResult(success=False, message=str(e))
 
+@strawberry.input
+class PrescriptionStatusInput:
+    id: str
+    status: str
+
+@strawberry.type
+class PrescriptionStatusResult:
+    id: str
+    success: bool
+    updated: bool
+    message: str
+    status: Optional[str] = None
+    version: Optional[int] = None
+
+async def update_prescription_statuses(
+    updates: List[PrescriptionStatusInput], db: AsyncSession
+) -> List[PrescriptionStatusResult]:
+    if len(updates) > PRESCRIPTION_BATCH_LIMIT:
+        raise ValueError(f"At most {PRESCRIPTION_BATCH_LIMIT} updates per request")
+    parsed = []
+    for u in updates:
+        try:
+            parsed.append((u, int(u.id)))
+        except ValueError:
+            parsed.append((u, None))
+    results = await prescription_batch.update_statuses(
+        db, [(prescription_id, u.status) for u, prescription_id in parsed if prescription_id is not None]
+    )
+    # One result per row: "01" and "1" are the same prescription and answer under the id given first
+    output = {}
+    for u, prescription_id in parsed:
+        if prescription_id is None:
+            output.setdefault(u.id, PrescriptionStatusResult(
+                id=u.id, success=False, updated=False, message="Invalid ID format"
+            ))
+        else:
+            output.setdefault(prescription_id, PrescriptionStatusResult(**{**results[prescription_id], "id": u.id}))
+    return list(output.values())
+
 @strawberry.type
 class Query:
     @strawberry.field
-    def validatePrescription(self, id: str, info) -> PrescriptionResult:
-        db = info.context["db"]
-        return get_prescription_validation(id, db)
+    async def validatePrescription(self, id: str, info) -> PrescriptionResult:
+        return await get_prescription_validation(id, info.context["loaders"])
+
+    @strawberry.field
+    async def validatePrescriptions(self, ids: List[str], info) -> List[PrescriptionResult]:
+        # The cost rule scores a list argument the same at any length, so cap it here
+        if len(ids) > PRESCRIPTION_BATCH_LIMIT:
+            raise ValueError(f"At most {PRESCRIPTION_BATCH_LIMIT} ids per request")
+        # Gathered so the loaders see every id in the same batch; results keep the order of ids
+        loaders = info.context["loaders"]
+        return await asyncio.gather(*(get_prescription_validation(id, loaders) for id in ids))
 
 @strawberry.type
 class Mutation:
     @strawberry.field
-    def updatePrescriptionStatus(self, id: str, status: str, info) -> PrescriptionUpdateResult:
+    async def updatePrescriptionStatus(self, id: str, status: str, info) -> PrescriptionUpdateResult:
         db = info.context["db"]
-        return update_prescription_status(id, status, db)
+        return await update_prescription_status(id, status, db)
+
+    @strawberry.field
+    async def updatePrescriptionStatuses(
+        self, updates: List[PrescriptionStatusInput], info
+    ) -> List[PrescriptionStatusResult]:
+        # One transaction and one UPDATE per distinct status, whatever the batch size
+        return await update_prescription_statuses(updates, info.context["db"])
 
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    extensions=[
+        # The limits run as validation rules, so their verdict is cached with the document
+        QueryDepthLimiter(max_depth=GRAPHQL_MAX_DEPTH),
+        MaxAliasesLimiter(max_alias_count=GRAPHQL_MAX_ALIASES),
+        QueryCostLimiter(max_cost=GRAPHQL_MAX_COST, list_factor=GRAPHQL_LIST_COST_FACTOR),
+        # Partner traffic repeats the same few documents
+        ParserCache(maxsize=GRAPHQL_DOCUMENT_CACHE_SIZE),
+        ValidationCache(maxsize=GRAPHQL_DOCUMENT_CACHE_SIZE),
+    ],
+)
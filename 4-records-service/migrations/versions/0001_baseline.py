@@ -0,0 +1,64 @@
+"""Baseline: the tables the service used to create with create_all at startup
+
+Tables that already exist are left alone, so databases created before
+migrations were introduced can be upgraded in place.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "medical_records" not in existing:
+        op.create_table(
+            "medical_records",
+            sa.Column("record_id", sa.Integer(), nullable=False),
+            sa.Column("patient_id", sa.Integer(), nullable=False),
+            sa.Column("doctor_id", sa.Integer(), nullable=False),
+            sa.Column("diagnosis", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.PrimaryKeyConstraint("record_id"),
+        )
+        op.create_index("ix_medical_records_record_id", "medical_records", ["record_id"])
+
+    if "prescriptions" not in existing:
+        op.create_table(
+            "prescriptions",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("patientName", sa.String(), nullable=False),
+            sa.Column("doctorName", sa.String(), nullable=False),
+            sa.Column("status", sa.String()),
+            sa.Column("createdAt", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_prescriptions_id", "prescriptions", ["id"])
+
+    if "prescription_items" not in existing:
+        op.create_table(
+            "prescription_items",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("prescription_id", sa.Integer(), sa.ForeignKey("prescriptions.id")),
+            sa.Column("medicine_id", sa.Integer(), nullable=False),
+            sa.Column("medicine_name", sa.String(), nullable=False),
+            sa.Column("quantity", sa.Integer(), nullable=False),
+            sa.Column("instructions", sa.String()),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_prescription_items_id", "prescription_items", ["id"])
+
+
+def downgrade():
+    op.drop_table("prescription_items")
+    op.drop_table("prescriptions")
+    op.drop_table("medical_records")
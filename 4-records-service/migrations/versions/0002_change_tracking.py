@@ -0,0 +1,57 @@
+"""Change tracking: updatedAt/version columns and the prescription_events feed
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    prescription_columns = {c["name"] for c in inspector.get_columns("prescriptions")}
+    item_columns = {c["name"] for c in inspector.get_columns("prescription_items")}
+
+    # A now() default cannot be added with ALTER TABLE on SQLite, so batch mode
+    # copies the table there; existing rows start at version 1
+    with op.batch_alter_table("prescriptions") as batch_op:
+        if "updatedAt" not in prescription_columns:
+            batch_op.add_column(sa.Column("updatedAt", sa.DateTime(timezone=True), server_default=sa.func.now()))
+        if "version" not in prescription_columns:
+            batch_op.add_column(sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+    if "updatedAt" not in prescription_columns:
+        prescriptions = sa.table("prescriptions", sa.column("createdAt"), sa.column("updatedAt"))
+        op.execute(prescriptions.update().values(updatedAt=prescriptions.c.createdAt))
+
+    with op.batch_alter_table("prescription_items") as batch_op:
+        if "updatedAt" not in item_columns:
+            batch_op.add_column(sa.Column("updatedAt", sa.DateTime(timezone=True), server_default=sa.func.now()))
+
+    if not inspector.has_table("prescription_events"):
+        op.create_table(
+            "prescription_events",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("prescription_id", sa.Integer(), nullable=False),
+            sa.Column("event", sa.String(), nullable=False),
+            sa.Column("status", sa.String()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.PrimaryKeyConstraint("id"),
+            sqlite_autoincrement=True,
+        )
+        op.create_index("ix_prescription_events_prescription_id", "prescription_events", ["prescription_id"])
+
+
+def downgrade():
+    op.drop_table("prescription_events")
+    with op.batch_alter_table("prescription_items") as batch_op:
+        batch_op.drop_column("updatedAt")
+    with op.batch_alter_table("prescriptions") as batch_op:
+        batch_op.drop_column("version")
+        batch_op.drop_column("updatedAt")
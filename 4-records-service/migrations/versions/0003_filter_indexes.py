@@ -0,0 +1,32 @@
+"""Indexes on the columns prescriptions and records are filtered and joined on
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_prescriptions_status", "prescriptions", ["status"]),
+    ("ix_prescriptions_patientName", "prescriptions", ["patientName"]),
+    ("ix_prescription_items_prescription_id", "prescription_items", ["prescription_id"]),
+    ("ix_medical_records_patient_id", "medical_records", ["patient_id"]),
+    ("ix_medical_records_doctor_id", "medical_records", ["doctor_id"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
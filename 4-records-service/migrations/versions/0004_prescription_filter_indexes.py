@@ -0,0 +1,31 @@
+"""Indexes for the GET /prescriptions filters and sorts
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_prescriptions_doctorName", "prescriptions", ["doctorName"]),
+    ("ix_prescriptions_createdAt", "prescriptions", ["createdAt"]),
+    ("ix_prescriptions_status_createdAt", "prescriptions", ["status", "createdAt"]),
+    ("ix_prescription_items_medicine_id", "prescription_items", ["medicine_id"]),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
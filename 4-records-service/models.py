@@ -1,37 +1,56 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database import Base
 
+# SQLite's CURRENT_TIMESTAMP has no fractional seconds; bind datetimes in the same
+# format so comparisons against stored values (e.g. keyset cursors) line up
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite"
+)
+
 class MedicalRecord(Base):
     __tablename__ = "medical_records"
     
     record_id = Column(Integer, primary_key=True, index=True)
-    patient_id = Column(Integer, nullable=False)
-    doctor_id = Column(Integer, nullable=False)
+    patient_id = Column(Integer, nullable=False, index=True)
+    doctor_id = Column(Integer, nullable=False, index=True)
     diagnosis = Column(String, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
 
 class Prescription(Base):
     __tablename__ = "prescriptions"
     
     id = Column(Integer, primary_key=True, index=True) # Changed from prescription_id to match request "id"
-    patientName = Column(String, nullable=False)
-    doctorName = Column(String, nullable=False)
-    status = Column(String, default="pending")
-    createdAt = Column(DateTime(timezone=True), server_default=func.now())
+    patientName = Column(String, nullable=False, index=True)
+    doctorName = Column(String, nullable=False, index=True)
+    status = Column(String, default="pending", index=True)
+    createdAt = Column(Timestamp, server_default=func.now(), index=True)
+    # Change tracking: bumped whenever the prescription or one of its items changes
+    updatedAt = Column(Timestamp, server_default=func.now(), onupdate=func.now())
+    version = Column(Integer, nullable=False, default=1)
     
     items = relationship("PrescriptionItem", back_populates="prescription", cascade="all, delete-orphan")
 
+    # Fetch createdAt/updatedAt with RETURNING during the flush, so a new or
+    # updated prescription can be returned without reloading it
+    __mapper_args__ = {"eager_defaults": True}
+
+    # The pending queue: ?status=pending&sort=createdAt reads this index in order
+    __table_args__ = (Index("ix_prescriptions_status_createdAt", "status", "createdAt"),)
+
 class PrescriptionItem(Base):
     __tablename__ = "prescription_items"
     
     id = Column(Integer, primary_key=True, index=True)
-    prescription_id = Column(Integer, ForeignKey("prescriptions.id"))
-    medicine_id = Column(Integer, nullable=False) # Changed/Added
+    prescription_id = Column(Integer, ForeignKey("prescriptions.id"), index=True)
+    medicine_id = Column(Integer, nullable=False, index=True) # Changed/Added
     medicine_name = Column(String, nullable=False) # Renamed from name
     quantity = Column(Integer, nullable=False)
     instructions = Column(String, nullable=True) # Renamed from notes
+    updatedAt = Column(Timestamp, server_default=func.now(), onupdate=func.now())
     
     prescription = relationship("Prescription", back_populates="items")
 
@@ -41,4 +60,16 @@ class PrescriptionItem(Base):
 
     @property
     def medicineName(self):
-        return self.medicine_name
\ No newline at end of file
+        return self.medicine_name
+
+class PrescriptionEvent(Base):
+    """Append-only change log behind the prescription change feed; ``id`` is the cursor."""
+    __tablename__ = "prescription_events"
+    # AUTOINCREMENT so SQLite never reuses ids and the cursor stays monotonic
+    __table_args__ = {"sqlite_autoincrement": True}
+    
+    id = Column(Integer, primary_key=True)
+    prescription_id = Column(Integer, nullable=False, index=True)
+    event = Column(String, nullable=False) # created, updated, status or deleted
+    status = Column(String, nullable=True)
+    created_at = Column(Timestamp, server_default=func.now())
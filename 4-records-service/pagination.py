@@ -0,0 +1,89 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import DateTime, and_, or_
+
+
+def encode_cursor(position: dict) -> str:
+    raw = json.dumps(position, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    if not cursor:
+        return {}
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        position = None
+    # Decoding is not enough: a position is a sort name, a key and (when sorted) a sort value
+    if not (
+        isinstance(position, dict)
+        and isinstance(position.get("s"), str)
+        and isinstance(position.get("k"), (int, str))
+        and isinstance(position.get("v"), (int, float, str, type(None)))
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return position
+
+
+def keyset_statement(query, key_column, cursor: str, limit: int, sort_column=None, descending: bool = False):
+    """Narrow ``query`` (a Query or a select()) to the page after ``cursor``.
+
+    Rows are ordered by ``sort_column`` (if given) and then the primary key, so
+    every page is an index range scan no matter how deep it is. The cursor is
+    opaque to clients and remembers which sort it belongs to.
+    """
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
+    sort_name = sort_column.key if sort_column is not None else key_column.key
+    position = decode_cursor(cursor)
+    if position and position.get("s") != sort_name:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort")
+
+    after = (lambda column, value: column < value) if descending else (lambda column, value: column > value)
+    if position:
+        if sort_column is None:
+            query = query.filter(after(key_column, position["k"]))
+        else:
+            if "v" not in position:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            value = position["v"]
+            if value is not None and isinstance(sort_column.type, DateTime):
+                try:
+                    value = datetime.fromisoformat(value)
+                except (TypeError, ValueError):
+                    raise HTTPException(status_code=400, detail="Invalid cursor")
+            query = query.filter(or_(
+                after(sort_column, value),
+                and_(sort_column == value, after(key_column, position["k"]))
+            ))
+
+    order = [sort_column, key_column] if sort_column is not None else [key_column]
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in order])
+
+    # One extra row tells us whether there is a next page
+    return query.limit(limit + 1)
+
+
+def keyset_result(rows, key_column, limit: int, sort_column=None):
+    """Trim the extra row fetched by keyset_statement and build the next cursor."""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        sort_name = sort_column.key if sort_column is not None else key_column.key
+        next_position = {"s": sort_name, "k": getattr(last, key_column.key)}
+        if sort_column is not None:
+            value = getattr(last, sort_column.key)
+            next_position["v"] = value.isoformat() if isinstance(value, datetime) else value
+        next_cursor = encode_cursor(next_position)
+    return rows, next_cursor
+
+
+def keyset_page(query, key_column, cursor: str, limit: int, sort_column=None, descending: bool = False):
+    """Fetch one page after ``cursor`` using a keyset (seek) instead of OFFSET."""
+    rows = keyset_statement(query, key_column, cursor, limit, sort_column, descending).all()
+    return keyset_result(rows, key_column, limit, sort_column)
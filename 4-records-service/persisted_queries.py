@@ -0,0 +1,97 @@
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Optional
+from graphql import GraphQLError
+from strawberry.fastapi import GraphQLRouter
+from strawberry.http import GraphQLRequestData
+from strawberry.http.exceptions import HTTPException
+from strawberry.types import ExecutionResult
+from config import GRAPHQL_PERSISTED_QUERIES_SIZE
+
+
+class PersistedQueryNotFound(Exception):
+    pass
+
+
+class PersistedQueryStore:
+    """LRU of query text by sha256, for Apollo-style automatic persisted queries.
+
+    A client first sends only ``extensions.persistedQuery.sha256Hash``; on a
+    miss it retries once with the full query, which is stored under its hash.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._queries = OrderedDict()
+
+    def resolve(self, query: Optional[str], extensions) -> Optional[str]:
+        if extensions is None:
+            return query
+        if not isinstance(extensions, dict):
+            raise HTTPException(400, "extensions must be an object")
+        persisted = extensions.get("persistedQuery")
+        if not persisted:
+            return query
+        if not isinstance(persisted, dict) or persisted.get("version") != 1 or not isinstance(persisted.get("sha256Hash"), str):
+            raise HTTPException(400, "Unsupported persisted query")
+        sha = persisted["sha256Hash"]
+
+        if query is None:
+            if sha not in self._queries:
+                raise PersistedQueryNotFound()
+            self._queries.move_to_end(sha)
+            return self._queries[sha]
+
+        if hashlib.sha256(query.encode()).hexdigest() != sha:
+            raise HTTPException(400, "provided sha does not match query")
+        self._queries[sha] = query
+        self._queries.move_to_end(sha)
+        while len(self._queries) > self.maxsize:
+            self._queries.popitem(last=False)
+        return query
+
+
+persisted_queries = PersistedQueryStore(GRAPHQL_PERSISTED_QUERIES_SIZE)
+
+
+class PersistedQueryRouter(GraphQLRouter):
+    """GraphQLRouter that also accepts ``extensions.persistedQuery`` (POST and GET)."""
+
+    def should_render_graphql_ide(self, request) -> bool:
+        # A GET carrying only a hash is a persisted query, not a browser opening GraphiQL
+        return "extensions" not in request.query_params and super().should_render_graphql_ide(request)
+
+    async def parse_http_body(self, request) -> GraphQLRequestData:
+        content_type = request.content_type or ""
+        if "application/json" in content_type:
+            data = self.parse_json(await request.get_body())
+        elif request.method == "GET":
+            data = self.parse_query_params(dict(request.query_params))
+            if isinstance(data.get("extensions"), str):
+                try:
+                    data["extensions"] = json.loads(data["extensions"])
+                except ValueError:
+                    raise HTTPException(400, "extensions must be JSON")
+        else:
+            return await super().parse_http_body(request)
+        if not isinstance(data, dict):
+            raise HTTPException(400, "Request body must be a JSON object")
+
+        return GraphQLRequestData(
+            query=persisted_queries.resolve(data.get("query"), data.get("extensions")),
+            variables=data.get("variables"),
+            operation_name=data.get("operationName"),
+        )
+
+    async def execute_operation(self, request, context, root_value) -> ExecutionResult:
+        try:
+            return await super().execute_operation(request, context, root_value)
+        except PersistedQueryNotFound:
+            # The error Apollo clients look for before resending with the full query
+            return ExecutionResult(
+                data=None,
+                errors=[GraphQLError(
+                    "PersistedQueryNotFound", extensions={"code": "PERSISTED_QUERY_NOT_FOUND"}
+                )],
+            )
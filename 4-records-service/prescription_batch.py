@@ -0,0 +1,99 @@
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+import models
+import schema
+import changefeed
+
+
+async def create_prescriptions(db: AsyncSession, prescriptions: List[schema.PrescriptionCreate]) -> List[models.Prescription]:
+    """Insert prescriptions and all their items in the caller's transaction.
+
+    Headers go through the ORM (so the change feed records them and eager_defaults
+    returns their ids and timestamps); items are one executemany INSERT instead of
+    one INSERT ... RETURNING per row. The caller commits.
+    """
+    headers = [
+        models.Prescription(patientName=p.patientName, doctorName=p.doctorName, status=p.status)
+        for p in prescriptions
+    ]
+    db.add_all(headers)
+    await db.flush()
+
+    rows = [
+        {
+            "prescription_id": header.id,
+            "medicine_id": item.medicineId,
+            "medicine_name": item.medicineName,
+            "quantity": item.quantity,
+            "instructions": item.instructions,
+        }
+        for header, p in zip(headers, prescriptions)
+        for item in p.items
+    ]
+    if rows:
+        await db.execute(insert(models.PrescriptionItem), rows)
+    return headers
+
+
+async def update_statuses(db: AsyncSession, changes: List[Tuple[int, str]]) -> Dict[int, dict]:
+    """Apply many status changes in one transaction, one UPDATE per target status.
+
+    Returns a result per prescription id, in the order the ids were first given.
+    When an id is listed more than once, its last status wins. Rows already in
+    the requested status are left alone (no version bump, no event).
+    """
+    # Keeps each id's first position and its last status
+    wanted = dict(changes)
+
+    current = {
+        row.id: row
+        for row in await db.execute(
+            select(models.Prescription.id, models.Prescription.status, models.Prescription.version)
+            .where(models.Prescription.id.in_(wanted))
+        )
+    }
+
+    groups = defaultdict(list)
+    for prescription_id, status in wanted.items():
+        if prescription_id in current and current[prescription_id].status != status:
+            groups[status].append(prescription_id)
+
+    # Bulk UPDATEs skip the ORM flush hooks, so version, updatedAt and the
+    # change-feed events are written here explicitly
+    versions = {}
+    for status, ids in groups.items():
+        result = await db.execute(
+            update(models.Prescription)
+            .where(models.Prescription.id.in_(ids))
+            .values(status=status, version=models.Prescription.version + 1, updatedAt=func.now())
+            .returning(models.Prescription.id, models.Prescription.version)
+            .execution_options(synchronize_session=False)
+        )
+        versions.update(result.all())
+    if versions:
+        await db.run_sync(
+            changefeed.insert_events,
+            {prescription_id: ("status", wanted[prescription_id]) for prescription_id in versions},
+        )
+    await db.commit()
+
+    results = {}
+    for prescription_id, status in wanted.items():
+        if prescription_id in versions:
+            results[prescription_id] = {
+                "id": prescription_id, "success": True, "updated": True, "status": status,
+                "version": versions[prescription_id], "message": f"Status updated to {status}",
+            }
+        elif prescription_id in current and current[prescription_id].status == status:
+            results[prescription_id] = {
+                "id": prescription_id, "success": True, "updated": False, "status": status,
+                "version": current[prescription_id].version, "message": f"Status already {status}",
+            }
+        else:
+            results[prescription_id] = {
+                "id": prescription_id, "success": False, "updated": False, "status": None,
+                "version": None, "message": "Prescription not found",
+            }
+    return results
@@ -0,0 +1,69 @@
+from typing import Set, Type
+from graphql import (
+    FieldNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    ValidationRule,
+    get_named_type,
+    get_nullable_type,
+    is_list_type,
+)
+from strawberry.extensions import AddValidationRules
+
+
+class QueryCostLimiter(AddValidationRules):
+    """Reject documents whose estimated cost exceeds ``max_cost`` before execution.
+
+    Every field costs 1; the selections under a list field count
+    ``list_factor`` times, since each of its items resolves them again.
+    Runs as a validation rule, so the result is cached with the document.
+    """
+
+    def __init__(self, max_cost: int, list_factor: int = 10):
+        super().__init__([create_validator(max_cost, list_factor)])
+
+
+def create_validator(max_cost: int, list_factor: int) -> Type[ValidationRule]:
+    class QueryCostValidator(ValidationRule):
+        def enter_operation_definition(self, node, *_):
+            root = self.context.schema.get_root_type(node.operation)
+            if root is None:
+                return
+            cost = self.selection_cost(root, node.selection_set, set())
+            if cost > max_cost:
+                self.report_error(GraphQLError(f"Query cost {cost} exceeds the limit of {max_cost}", node))
+
+        def selection_cost(self, parent_type, selection_set, visited: Set[str]) -> int:
+            cost = 0
+            for selection in selection_set.selections:
+                if isinstance(selection, FieldNode):
+                    # Introspection and unknown fields are left to the other rules
+                    field = getattr(parent_type, "fields", {}).get(selection.name.value)
+                    if field is None:
+                        continue
+                    cost += 1
+                    if selection.selection_set:
+                        multiplier = list_factor if is_list_type(get_nullable_type(field.type)) else 1
+                        cost += multiplier * self.selection_cost(
+                            get_named_type(field.type), selection.selection_set, visited
+                        )
+                elif isinstance(selection, InlineFragmentNode):
+                    fragment_type = parent_type
+                    if selection.type_condition:
+                        fragment_type = self.context.schema.get_type(
+                            selection.type_condition.name.value
+                        ) or parent_type
+                    cost += self.selection_cost(fragment_type, selection.selection_set, visited)
+                elif isinstance(selection, FragmentSpreadNode):
+                    name = selection.name.value
+                    fragment = self.context.get_fragment(name)
+                    if fragment is None or name in visited:
+                        continue
+                    fragment_type = self.context.schema.get_type(
+                        fragment.type_condition.name.value
+                    ) or parent_type
+                    cost += self.selection_cost(fragment_type, fragment.selection_set, visited | {name})
+            return cost
+
+    return QueryCostValidator
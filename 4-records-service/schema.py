@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 # --- Medical Record Schemas (Existing) ---
@@ -18,6 +18,10 @@ class MedicalRecordResponse(MedicalRecordBase):
     class Config:
         from_attributes = True
 
+class MedicalRecordPage(BaseModel):
+    items: List[MedicalRecordResponse]
+    next_cursor: Optional[str] = None
+
 # --- Prescription Schemas (New) ---
 class PrescriptionItemBase(BaseModel):
     medicineId: int
@@ -48,7 +52,67 @@ class PrescriptionResponse(BaseModel):
     doctorName: str
     status: str
     createdAt: datetime
+    updatedAt: Optional[datetime] = None
+    version: int = 1
     items: List[PrescriptionItemResponse]
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PrescriptionPage(BaseModel):
+    items: List[PrescriptionResponse]
+    next_cursor: Optional[str] = None
+
+class PrescriptionBatchCreate(BaseModel):
+    prescriptions: List[PrescriptionCreate]
+
+class PrescriptionBatchResult(BaseModel):
+    created: int
+    ids: List[int]
+
+class PrescriptionStatusChange(BaseModel):
+    id: int
+    status: str
+
+class PrescriptionStatusBatch(BaseModel):
+    updates: List[PrescriptionStatusChange]
+
+class PrescriptionStatusResult(BaseModel):
+    id: int
+    success: bool
+    updated: bool = False  # False when the prescription already had this status
+    status: Optional[str] = None
+    version: Optional[int] = None
+    message: str
+
+class PrescriptionStatusBatchResult(BaseModel):
+    updated: int
+    results: List[PrescriptionStatusResult]
+
+# --- Change Feed Schemas ---
+class PrescriptionEventResponse(BaseModel):
+    id: int
+    prescription_id: int
+    event: str
+    status: Optional[str] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class PrescriptionChanges(BaseModel):
+    events: List[PrescriptionEventResponse]
+    cursor: int
+
+class PrescriptionDelta(BaseModel):
+    changed: List[PrescriptionResponse]
+    deleted: List[int] # tombstones: ids deleted since the given cursor
+    cursor: int
+
+# --- Stats Schemas ---
+class MedicalRecordStats(BaseModel):
+    total: int
+
+class PrescriptionStats(BaseModel):
+    total: int
+    by_status: Dict[str, int]
\ No newline at end of file
@@ -0,0 +1,177 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+from fastapi import HTTPException
+from jose import ExpiredSignatureError, JWTError, jwt
+
+from config import (
+    AUTH_CONNECT_TIMEOUT,
+    AUTH_MAX_CONNECTIONS,
+    AUTH_SERVICE_URL,
+    AUTH_TIMEOUT,
+    GATEWAY_IDENTITY_SECRET,
+    JWT_ALGORITHM,
+    JWT_SECRET_KEY,
+    TOKEN_CACHE_SIZE,
+    TOKEN_CACHE_TTL,
+)
+
+
+class TokenCache:
+    """Bounded LRU of verified claims keyed by token.
+
+    An entry lives for at most ``ttl`` seconds and never past the token's ``exp``.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            claims, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return claims
+
+    def set(self, token: str, claims: dict, exp=None):
+        expires_at = time.time() + self.ttl
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        with self._lock:
+            self._entries[token] = (claims, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
+
+
+def verify_locally(token: str):
+    """Decode the token with the shared HS256 key; None means "ask the auth service"."""
+    if not JWT_SECRET_KEY:
+        return None
+    try:
+        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
+    except ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token has expired")
+    except JWTError:
+        # Possibly signed with a key we don't hold (e.g. after rotation)
+        return None
+    return {"valid": True, "email": payload.get("sub"), "role": payload.get("role")}
+
+
+def verify_identity(value: str):
+    """Claims from a gateway-signed ``<payload>.<signature>`` header; None if it can't be trusted."""
+    if not GATEWAY_IDENTITY_SECRET or not value:
+        return None
+    try:
+        payload, signature = value.split(".")
+        expected = hmac.new(GATEWAY_IDENTITY_SECRET.encode(), payload.encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(base64.urlsafe_b64decode(signature + "=" * (-len(signature) % 4)), expected):
+            return None
+        identity = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except ValueError:
+        return None
+    if float(identity.get("exp") or 0) <= time.time():
+        return None
+    return {"valid": True, "email": identity.get("sub"), "role": identity.get("role")}
+
+
+class AuthClient:
+    """Pooled async client for the auth service.
+
+    Connections are bound to the event loop that opened them, so a new pool
+    is started if the loop changes (e.g. between test clients).
+    """
+
+    def __init__(self):
+        self._client = None
+        self._loop = None
+
+    def get(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=AUTH_SERVICE_URL,
+                limits=httpx.Limits(max_connections=AUTH_MAX_CONNECTIONS),
+                timeout=httpx.Timeout(AUTH_TIMEOUT, connect=AUTH_CONNECT_TIMEOUT),
+            )
+            self._loop = loop
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+
+
+auth_client = AuthClient()
+
+# Remote checks in progress, by token: concurrent requests with the same token share one call
+_in_flight = {}
+
+
+async def verify_remotely(token: str) -> dict:
+    try:
+        response = await auth_client.get().post("/verify-token", headers={"Authorization": f"Bearer {token}"})
+    except httpx.HTTPError as e:
+        # Not the caller's fault, so not a 401
+        raise HTTPException(status_code=503, detail=f"Auth Service unavailable: {type(e).__name__}")
+    if response.status_code != 200:
+        raise HTTPException(status_code=401, detail=f"Auth Service rejected: {response.text}")
+    return response.json()
+
+
+def _finish_remote_check(token: str, task):
+    if _in_flight.get(token) is task:
+        del _in_flight[token]
+    # Mark a rejection as seen even if every waiter went away
+    if not task.cancelled():
+        task.exception()
+
+
+async def verify_remotely_once(token: str) -> dict:
+    task = _in_flight.get(token)
+    if task is None:
+        task = _in_flight[token] = asyncio.ensure_future(verify_remotely(token))
+        task.add_done_callback(lambda done: _finish_remote_check(token, done))
+    # Shielded so one caller going away does not cancel the check for the others
+    return await asyncio.shield(task)
+
+
+async def verify(token: str) -> dict:
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+
+    claims = verify_locally(token)
+    if claims is None:
+        claims = await verify_remotely_once(token)
+
+    # The auth service vouched for the token, so its exp claim can be trusted
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        exp = None
+    token_cache.set(token, claims, exp)
+    return claims
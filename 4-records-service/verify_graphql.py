@@ -1,13 +1,17 @@
 
+import os
+import tempfile
+
+# Run against a throwaway database so local data is not touched
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/verify_graphql.db"
+
 from fastapi.testclient import TestClient
-from main import app, get_db
+import migrate
+from main import app
 import models
-from database import engine, SessionLocal
-
-# Re-create tables to be sure (optional, but safe for testing if we want a clean state, 
-# but here I'll just add data to existing)
-# models.Base.metadata.create_all(bind=engine)
+from database import SessionLocal
 
+migrate.upgrade()
 client = TestClient(app)
 
 def setup_test_data():
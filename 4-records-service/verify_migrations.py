@@ -0,0 +1,74 @@
+import os
+import tempfile
+
+# Run against a throwaway database so local data is not touched
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/verify_migrations.db"
+
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+import migrate
+import models
+from database import engine
+
+alembic_config = Config(migrate.ALEMBIC_INI)
+head = ScriptDirectory.from_config(alembic_config).get_current_head()
+
+def current_revision():
+    with engine.connect() as conn:
+        return MigrationContext.configure(conn).get_current_revision()
+
+def test_head_matches_models():
+    migrate.upgrade()
+    with engine.connect() as conn:
+        diff = compare_metadata(MigrationContext.configure(conn), models.Base.metadata)
+    assert diff == [], diff
+    assert current_revision() == head
+
+    command.downgrade(alembic_config, "base")
+    assert inspect(engine).get_table_names() == ["alembic_version"]
+    print("Migrations match the models and downgrade cleanly: OK")
+
+def test_upgrade_keeps_existing_rows():
+    # A database as the service left it before change tracking existed
+    migrate.upgrade("0001")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO prescriptions (id, \"patientName\", \"doctorName\", status, \"createdAt\") "
+            "VALUES (1, 'Budi', 'Dr. Sari', 'pending', '2024-01-02 03:04:05')"
+        ))
+        conn.execute(text(
+            "INSERT INTO prescription_items (prescription_id, medicine_id, medicine_name, quantity) "
+            "VALUES (1, 7, 'Paracetamol', 10)"
+        ))
+
+    migrate.upgrade()
+    with engine.connect() as conn:
+        row = conn.execute(text('SELECT version, "updatedAt" FROM prescriptions WHERE id = 1')).one()
+        items = conn.execute(text("SELECT COUNT(*) FROM prescription_items")).scalar()
+    assert row.version == 1 and row.updatedAt == "2024-01-02 03:04:05", row
+    assert items == 1
+
+    command.downgrade(alembic_config, "base")
+    print("Upgrade backfills existing prescriptions: OK")
+
+def test_adopts_create_all_database():
+    # Databases created by the old create_all at startup have no alembic_version
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_prescriptions_status"))
+
+    migrate.upgrade()
+    assert current_revision() == head
+    indexes = {index["name"] for index in inspect(engine).get_indexes("prescriptions")}
+    assert "ix_prescriptions_status" in indexes
+    print("Existing create_all database upgraded in place: OK")
+
+if __name__ == "__main__":
+    test_head_matches_models()
+    test_upgrade_keeps_existing_rows()
+    test_adopts_create_all_database()
+    print("Verification SUCCESS!")
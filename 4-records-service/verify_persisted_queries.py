@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+import tempfile
+
+# Run against a throwaway database so local data is not touched
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/verify_persisted_queries.db"
+
+from fastapi.testclient import TestClient
+import migrate
+from main import app
+from config import GRAPHQL_MAX_ALIASES, GRAPHQL_MAX_COST
+
+migrate.upgrade()
+client = TestClient(app)
+
+QUERY = "query V($id: String!) { validatePrescription(id: $id) { isValid } }"
+EXTENSIONS = {"persistedQuery": {"version": 1, "sha256Hash": hashlib.sha256(QUERY.encode()).hexdigest()}}
+
+def test_automatic_persisted_query():
+    # Unknown hash: the client is told to resend with the full query
+    response = client.post("/graphql", json={"extensions": EXTENSIONS, "variables": {"id": "1"}})
+    assert response.json()["errors"][0]["extensions"]["code"] == "PERSISTED_QUERY_NOT_FOUND"
+
+    response = client.post("/graphql", json={"query": QUERY, "extensions": EXTENSIONS, "variables": {"id": "1"}})
+    assert response.json()["data"]["validatePrescription"]["isValid"] == False
+
+    # From now on the hash alone is enough, over POST and GET
+    response = client.post("/graphql", json={"extensions": EXTENSIONS, "variables": {"id": "1"}})
+    assert "errors" not in response.json(), response.text
+    response = client.get("/graphql", params={"extensions": json.dumps(EXTENSIONS), "variables": json.dumps({"id": "1"})})
+    assert response.json()["data"]["validatePrescription"]["isValid"] == False
+
+    response = client.post("/graphql", json={"query": QUERY + " ", "extensions": EXTENSIONS})
+    assert response.status_code == 400
+
+    # Malformed extensions are the client's mistake, not a 500
+    for extensions in ("x", {"persistedQuery": "x"}, {"persistedQuery": {"version": 2}}):
+        response = client.post("/graphql", json={"query": QUERY, "extensions": extensions})
+        assert response.status_code == 400, response.text
+        response = client.get("/graphql", params={"query": QUERY, "extensions": json.dumps(extensions)})
+        assert response.status_code == 400, response.text
+    assert client.get("/graphql", params={"query": QUERY, "extensions": "{not json"}).status_code == 400
+    assert client.post("/graphql", json=[{"query": QUERY}]).status_code == 400
+    print("Automatic persisted queries: OK")
+
+def test_limits():
+    aliases = " ".join(f'a{i}: validatePrescription(id: "1") {{ isValid }}' for i in range(GRAPHQL_MAX_ALIASES + 1))
+    response = client.post("/graphql", json={"query": f"{{ {aliases} }}"})
+    assert response.json().get("data") is None
+    assert "aliases" in response.json()["errors"][0]["message"]
+
+    # Each bulk field costs 1 + 10 * (isValid + patientName + medicines (1 + 10 * 2)) = 231
+    fields = " ".join(
+        f"a{i}: validatePrescriptions(ids: []) {{ isValid patientName medicines {{ name qty }} }}"
+        for i in range(GRAPHQL_MAX_COST // 231 + 1)
+    )
+    response = client.post("/graphql", json={"query": f"{{ {fields} }}"})
+    assert response.json().get("data") is None
+    assert "cost" in response.json()["errors"][0]["message"]
+    print("Alias and cost limits: OK")
+
+if __name__ == "__main__":
+    test_automatic_persisted_query()
+    test_limits()
+    print("Verification SUCCESS!")
@@ -0,0 +1,139 @@
+import base64
+import os
+import tempfile
+
+# Run against a throwaway database so local data is not touched
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/verify_prescription_filters.db"
+
+from fastapi.testclient import TestClient
+from unittest import mock
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError
+import migrate
+from main import app
+import prescription_batch
+from database import engine, async_engine
+
+migrate.upgrade()
+client = TestClient(app)
+
+def setup_test_data():
+    prescriptions = [
+        {
+            "patientName": f"Patient {i % 5}",
+            "doctorName": f"Dr. {i % 3}",
+            "status": "pending" if i % 4 else "completed",
+            "items": [{"medicineId": i % 7, "medicineName": f"Medicine {i % 7}", "quantity": 1}],
+        }
+        for i in range(40)
+    ]
+    ids = client.post("/prescriptions/batch", json={"prescriptions": prescriptions}).json()["ids"]
+    # One prescription per day so the date range has something to cut
+    with engine.begin() as conn:
+        for day, prescription_id in enumerate(ids):
+            conn.execute(
+                text('UPDATE prescriptions SET "createdAt" = :created WHERE id = :id'),
+                {"created": f"2024-01-{day % 28 + 1:02d} 08:00:00", "id": prescription_id},
+            )
+
+def test_batch_errors():
+    prescription = {"patientName": "P", "doctorName": "D", "items": []}
+    failures = {
+        IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed: secret_table.id")): 400,
+        RuntimeError("disk I/O error at /var/lib/secret"): 500,
+    }
+    for error, status_code in failures.items():
+        with mock.patch.object(prescription_batch, "create_prescriptions", side_effect=error):
+            response = client.post("/prescriptions/batch", json={"prescriptions": [prescription]})
+        assert response.status_code == status_code
+        assert "secret" not in response.text, response.text
+    print("Batch errors answered without database details: OK")
+
+def list_ids(**params):
+    response = client.get("/prescriptions", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_filters():
+    rows = list_ids(status="pending")
+    assert len(rows) == 30 and all(p["status"] == "pending" for p in rows)
+    assert len(list_ids(status=["pending", "completed"])) == 40
+
+    rows = list_ids(patientName="Patient 1", doctorName="Dr. 0")
+    assert rows and all(p["patientName"] == "Patient 1" and p["doctorName"] == "Dr. 0" for p in rows)
+
+    rows = list_ids(medicine_id=3)
+    assert len(rows) == 6 and all(p["items"][0]["medicineId"] == 3 for p in rows)
+
+    rows = list_ids(created_from="2024-01-05", created_to="2024-01-07")
+    assert {p["createdAt"][:10] for p in rows} == {"2024-01-05", "2024-01-06"}
+    print("Filters: OK")
+
+def test_sorting():
+    rows = list_ids(status="pending", sort="createdAt", order="desc")
+    keys = [(p["createdAt"], p["id"]) for p in rows]
+    assert keys == sorted(keys, reverse=True)
+
+    # Keyset pages over a filtered, sorted list add up to the same rows
+    paged, cursor = [], ""
+    while cursor is not None:
+        page = list_ids(status="pending", sort="createdAt", order="desc", cursor=cursor, limit=7)
+        paged += page["items"]
+        cursor = page["next_cursor"]
+    assert [p["id"] for p in paged] == [p["id"] for p in rows]
+
+    # Malformed cursors and empty pages are the caller's mistake, not a 500
+    bad_cursors = ["1", "[1]", '{"s":"id"}', '{"s":"createdAt","k":1,"v":"notadate"}', '{"s":"createdAt","k":1}']
+    for raw in bad_cursors:
+        cursor = base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+        response = client.get("/prescriptions", params={"sort": "createdAt", "cursor": cursor})
+        assert response.status_code == 400 and response.json()["detail"] == "Invalid cursor", (raw, response.text)
+    assert client.get("/prescriptions", params={"cursor": "%%%"}).status_code == 400
+    for limit in (0, -1):
+        assert client.get("/prescriptions", params={"cursor": "", "limit": limit}).status_code == 400
+
+    assert client.get("/prescriptions", params={"sort": "status"}).status_code == 400
+    assert client.get("/prescriptions", params={"order": "sideways"}).status_code == 400
+    assert client.get("/prescriptions", params={"status": "pending", "updated_since": 0}).status_code == 400
+    print("Sorting and keyset pages: OK")
+
+def query_plan(**params):
+    """EXPLAIN QUERY PLAN of the prescriptions SELECT issued for ``params``."""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("SELECT prescriptions."):
+            captured.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        list_ids(**params)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    statement, parameters = captured[0]
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return " | ".join(row[-1] for row in plan)
+
+def test_filters_use_indexes():
+    plans = {
+        "pending queue": (query_plan(status="pending", sort="createdAt"), "ix_prescriptions_status_createdAt"),
+        "patientName": (query_plan(patientName="Patient 1"), "ix_prescriptions_patientName"),
+        "doctorName": (query_plan(doctorName="Dr. 1"), "ix_prescriptions_doctorName"),
+        "date range": (query_plan(created_from="2024-01-05", sort="createdAt"), "ix_prescriptions_createdAt"),
+        "medicine_id": (query_plan(medicine_id=3), "ix_prescription_items_medicine_id"),
+    }
+    for name, (plan, index) in plans.items():
+        print(f"{name}: {plan}")
+        assert index in plan, plan
+    # Read in index order: no sort step for the pending queue
+    assert "TEMP B-TREE" not in plans["pending queue"][0]
+    print("Filters use indexes: OK")
+
+if __name__ == "__main__":
+    setup_test_data()
+    test_filters()
+    test_sorting()
+    test_filters_use_indexes()
+    test_batch_errors()
+    print("Verification SUCCESS!")
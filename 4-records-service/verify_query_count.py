@@ -0,0 +1,214 @@
+
+import os
+import tempfile
+
+# Run against a throwaway database so the counts are not affected by local data
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/verify_query_count.db"
+
+from contextlib import contextmanager
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+import migrate
+from main import app
+import models
+from database import engine, async_engine, SessionLocal
+from config import PRESCRIPTION_BATCH_LIMIT
+
+migrate.upgrade()
+client = TestClient(app)
+
+PRESCRIPTIONS = 50
+ITEMS_PER_PRESCRIPTION = 3
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # Prescriptions go through the async engine; count both to catch strays
+    engines = (engine, async_engine.sync_engine)
+    for e in engines:
+        event.listen(e, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for e in engines:
+            event.remove(e, "before_cursor_execute", before_cursor_execute)
+
+def setup_test_data():
+    db = SessionLocal()
+    for i in range(PRESCRIPTIONS):
+        prescription = models.Prescription(
+            patientName=f"Patient {i}",
+            doctorName="Dr. Smith",
+            status="pending"
+        )
+        for j in range(ITEMS_PER_PRESCRIPTION):
+            prescription.items.append(models.PrescriptionItem(
+                medicine_id=100 + j,
+                medicine_name=f"Medicine {j}",
+                quantity=j + 1,
+                instructions="After meal"
+            ))
+        db.add(prescription)
+    db.commit()
+    first_id = db.query(models.Prescription.id).order_by(models.Prescription.id).first()[0]
+    db.close()
+    return first_id
+
+def test_create_prescription_query_count():
+    body = {
+        "patientName": "New Patient",
+        "doctorName": "Dr. Smith",
+        "items": [
+            {"medicineId": 100 + j, "medicineName": f"Medicine {j}", "quantity": 1}
+            for j in range(ITEMS_PER_PRESCRIPTION)
+        ],
+    }
+    with count_queries() as statements:
+        response = client.post("/prescriptions", json=body)
+    created = response.json()
+    assert response.status_code == 200
+    assert created["version"] == 1 and created["createdAt"]
+    assert len(created["items"]) == ITEMS_PER_PRESCRIPTION
+    # Header (RETURNING), all items in one executemany, the change event
+    assert len(statements) == 3, f"expected 3 queries, got {len(statements)}"
+    print(f"POST /prescriptions ({ITEMS_PER_PRESCRIPTION} items): {len(statements)} queries")
+    assert client.get(f"/prescriptions/{created['id']}").json()["items"] == created["items"]
+    client.delete(f"/prescriptions/{created['id']}")
+
+def test_list_prescriptions_query_count():
+    with count_queries() as statements:
+        response = client.get("/prescriptions", params={"limit": PRESCRIPTIONS})
+    assert response.status_code == 200
+    assert len(response.json()) == PRESCRIPTIONS
+    assert all(len(p["items"]) == ITEMS_PER_PRESCRIPTION for p in response.json())
+    # Change cursor (for the ETag), the page, then all of its items at once
+    assert len(statements) == 3, f"expected 3 queries, got {len(statements)}"
+    print(f"GET /prescriptions?limit={PRESCRIPTIONS}: {len(statements)} queries")
+
+def test_get_prescription_query_count(p_id):
+    with count_queries() as statements:
+        response = client.get(f"/prescriptions/{p_id}")
+    assert response.status_code == 200
+    assert len(response.json()["items"]) == ITEMS_PER_PRESCRIPTION
+    # Version (for the ETag), the row, then its items
+    assert len(statements) == 3, f"expected 3 queries, got {len(statements)}"
+    print(f"GET /prescriptions/{p_id}: {len(statements)} queries")
+
+    with count_queries() as statements:
+        response = client.get(f"/prescriptions/{p_id}", headers={"If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+    assert len(statements) == 1, f"expected 1 query, got {len(statements)}"
+    print(f"GET /prescriptions/{p_id} (not modified): {len(statements)} queries")
+
+def test_validate_prescription_query_count(p_id):
+    query = """
+    query GetPrescription($id: String!) {
+        validatePrescription(id: $id) {
+            isValid
+            medicines { name qty }
+        }
+    }
+    """
+    with count_queries() as statements:
+        response = client.post("/graphql", json={"query": query, "variables": {"id": str(p_id)}})
+    result = response.json()["data"]["validatePrescription"]
+    assert result["isValid"] == True
+    assert len(result["medicines"]) == ITEMS_PER_PRESCRIPTION
+    assert len(statements) == 2, f"expected 2 queries, got {len(statements)}"
+    print(f"validatePrescription: {len(statements)} queries")
+
+def test_aliased_validations_query_count(p_id):
+    # One aliased field per prescription, plus one that does not exist
+    fields = "\n".join(
+        f'v{i}: validatePrescription(id: "{p_id + i}") {{ isValid patientName medicines {{ name qty }} }}'
+        for i in range(PRESCRIPTIONS + 1)
+    )
+    with count_queries() as statements:
+        response = client.post("/graphql", json={"query": f"query {{ {fields} }}"})
+    data = response.json()["data"]
+    assert all(data[f"v{i}"]["isValid"] for i in range(PRESCRIPTIONS))
+    assert data[f"v{PRESCRIPTIONS}"]["isValid"] == False
+    assert all(len(data[f"v{i}"]["medicines"]) == ITEMS_PER_PRESCRIPTION for i in range(PRESCRIPTIONS))
+    assert len(statements) == 2, f"expected 2 queries, got {len(statements)}"
+    print(f"{PRESCRIPTIONS + 1} aliased validatePrescription: {len(statements)} queries")
+
+def test_validate_prescriptions_query_count(p_id):
+    query = """
+    query Bulk($ids: [String!]!) {
+        validatePrescriptions(ids: $ids) { id isValid medicines { name qty } }
+    }
+    """
+    ids = [str(p_id + i) for i in range(PRESCRIPTIONS)] + ["not-a-number"]
+    with count_queries() as statements:
+        response = client.post("/graphql", json={"query": query, "variables": {"ids": ids}})
+    results = response.json()["data"]["validatePrescriptions"]
+    assert [r["id"] for r in results] == ids
+    assert [r["isValid"] for r in results] == [True] * PRESCRIPTIONS + [False]
+    assert len(statements) == 2, f"expected 2 queries, got {len(statements)}"
+    print(f"validatePrescriptions({len(ids)} ids): {len(statements)} queries")
+
+    too_many = ["1"] * (PRESCRIPTION_BATCH_LIMIT + 1)
+    response = client.post("/graphql", json={"query": query, "variables": {"ids": too_many}})
+    assert response.json()["data"] is None
+    assert "At most" in response.json()["errors"][0]["message"]
+
+def test_bulk_status_query_count(p_id):
+    ids = list(range(p_id, p_id + PRESCRIPTIONS))
+    updates = [{"id": i, "status": "processed"} for i in ids] + [{"id": 999999, "status": "processed"}]
+    versions = {i: client.get(f"/prescriptions/{i}").json()["version"] for i in ids}
+    cursor = int(client.get("/prescriptions", params={"limit": 1}).headers["X-Change-Cursor"])
+    with count_queries() as statements:
+        response = client.patch("/prescriptions/status", json={"updates": updates})
+    body = response.json()
+    assert body["updated"] == PRESCRIPTIONS
+    assert body["results"][-1] == {
+        "id": 999999, "success": False, "updated": False, "status": None, "version": None,
+        "message": "Prescription not found",
+    }
+    assert all(r["version"] == versions[r["id"]] + 1 for r in body["results"][:-1])
+    # Current rows, one UPDATE for the single target status, one INSERT of change events
+    assert len(statements) == 3, f"expected 3 queries, got {len(statements)}"
+    print(f"PATCH /prescriptions/status ({len(updates)} updates): {len(statements)} queries")
+
+    changes = client.get("/prescriptions/changes", params={"cursor": cursor}).json()["events"]
+    assert sorted(e["prescription_id"] for e in changes) == ids
+    assert {e["event"] for e in changes} == {"status"}
+
+    # Repeating the batch changes nothing
+    body = client.patch("/prescriptions/status", json={"updates": updates}).json()
+    assert body["updated"] == 0 and body["results"][0]["message"] == "Status already processed"
+
+def test_bulk_status_mutation_ids(p_id):
+    query = """
+    mutation Bulk($updates: [PrescriptionStatusInput!]!) {
+        updatePrescriptionStatuses(updates: $updates) { id success updated message }
+    }
+    """
+    ids = [str(p_id), f"0{p_id}", "\u00b2", "abc", "abc"]
+    updates = [{"id": i, "status": "dispensed"} for i in ids]
+    response = client.post("/graphql", json={"query": query, "variables": {"updates": updates}})
+    body = response.json()
+    assert "errors" not in body, body
+    # "0<id>" is the same row as "<id>"; unparseable ids fail on their own
+    assert body["data"]["updatePrescriptionStatuses"] == [
+        {"id": str(p_id), "success": True, "updated": True, "message": "Status updated to dispensed"},
+        {"id": "\u00b2", "success": False, "updated": False, "message": "Invalid ID format"},
+        {"id": "abc", "success": False, "updated": False, "message": "Invalid ID format"},
+    ]
+    print("updatePrescriptionStatuses: one result per row, per-id errors: OK")
+
+if __name__ == "__main__":
+    p_id = setup_test_data()
+    test_create_prescription_query_count()
+    test_list_prescriptions_query_count()
+    test_get_prescription_query_count(p_id)
+    test_validate_prescription_query_count(p_id)
+    test_aliased_validations_query_count(p_id)
+    test_validate_prescriptions_query_count(p_id)
+    test_bulk_status_query_count(p_id)
+    test_bulk_status_mutation_ids(p_id)
+    print("Verification SUCCESS!")
@@ -0,0 +1,92 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from jose import JWTError, jwt
+
+# Set by the gateway only; anything a client sends under this name is dropped
+IDENTITY_HEADER = "x-gateway-identity"
+
+
+def b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def sign_identity(claims: dict, secret: str, ttl: float) -> str:
+    """``<payload>.<signature>``: base64url JSON of sub/role/exp and its HMAC-SHA256.
+
+    The header expires after ``ttl`` seconds (or with the token, if sooner),
+    so a captured header is only good for a short while.
+    """
+    exp = int(time.time() + ttl)
+    if claims.get("exp") is not None:
+        exp = min(exp, int(claims["exp"]))
+    payload = b64encode(json.dumps(
+        {"sub": claims.get("sub"), "role": claims.get("role"), "exp": exp}, separators=(",", ":")
+    ).encode())
+    signature = b64encode(hmac.new(secret.encode(), payload.encode(), hashlib.sha256).digest())
+    return f"{payload}.{signature}"
+
+
+class GatewayAuth:
+    """Verifies bearer tokens once at the gateway and vouches for them to the services.
+
+    Decoded claims are kept in a bounded LRU keyed by token, never past the
+    token's ``exp``. Tokens that do not verify here (bypass tokens, other keys)
+    get no identity header and are left to the service to judge.
+    """
+
+    def __init__(self, jwt_secret: str, algorithm: str, identity_secret: str, identity_ttl: float,
+                 cache_size: int, cache_ttl: float):
+        self.jwt_secret = jwt_secret
+        self.algorithm = algorithm
+        self.identity_secret = identity_secret
+        self.identity_ttl = identity_ttl
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self._claims = OrderedDict()
+        self.stats = {"verified": 0, "cache_hits": 0, "rejected": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.identity_secret and self.jwt_secret)
+
+    def claims_for(self, token: str) -> Optional[dict]:
+        now = time.time()
+        entry = self._claims.get(token)
+        if entry is not None and entry[1] > now:
+            self._claims.move_to_end(token)
+            self.stats["cache_hits"] += 1
+            return entry[0]
+
+        try:
+            payload = jwt.decode(token, self.jwt_secret, algorithms=[self.algorithm])
+        except JWTError:
+            self.stats["rejected"] += 1
+            claims, expires_at = None, now + self.cache_ttl
+        else:
+            self.stats["verified"] += 1
+            claims = {"sub": payload.get("sub"), "role": payload.get("role"), "exp": payload.get("exp")}
+            expires_at = now + self.cache_ttl
+            if claims["exp"] is not None:
+                expires_at = min(expires_at, float(claims["exp"]))
+        self._claims[token] = (claims, expires_at)
+        self._claims.move_to_end(token)
+        while len(self._claims) > self.cache_size:
+            self._claims.popitem(last=False)
+        return claims
+
+    def identity_header(self, authorization: Optional[str]) -> Optional[str]:
+        if not self.enabled or not authorization or " " not in authorization:
+            return None
+        claims = self.claims_for(authorization.split(" ", 1)[1])
+        if claims is None:
+            return None
+        return sign_identity(claims, self.identity_secret, self.identity_ttl)
+
+    def snapshot(self) -> dict:
+        return {"enabled": self.enabled, **self.stats, "cached_tokens": len(self._claims)}
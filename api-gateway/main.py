@@ -1,10 +1,214 @@
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from contextlib import asynccontextmanager
+import asyncio
+import hashlib
 import httpx
+import math
 import os
+import random
+import re
+import time
+from resilience import CircuitBreaker, CircuitOpen, RetryBudget
+from response_cache import CachedRoute, ResponseCache, parse_cache_control, response_ttl
+from single_flight import CoalescedRoute, SingleFlight
+from identity import IDENTITY_HEADER, GatewayAuth
 
-app = FastAPI(title="Hospital API Gateway", version="1.0.0")
+def service_config(name: str, url_env: str, default_url: str, read_timeout: str = "30") -> dict:
+    # Pool limits, timeouts and failure handling can be tuned per service, e.g. RECORDS_MAX_CONNECTIONS=200
+    prefix = name.upper()
+    return {
+        "url": os.getenv(url_env, default_url),
+        "max_connections": int(os.getenv(f"{prefix}_MAX_CONNECTIONS", "100")),
+        # Change feeds hold their connection for as long as a dashboard stays open,
+        # so they get a pool of their own and never starve ordinary requests
+        "feed_max_connections": int(os.getenv(f"{prefix}_FEED_MAX_CONNECTIONS", "1000")),
+        "max_keepalive_connections": int(os.getenv(f"{prefix}_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        "keepalive_expiry": float(os.getenv(f"{prefix}_KEEPALIVE_EXPIRY", "30")),
+        "connect_timeout": float(os.getenv(f"{prefix}_CONNECT_TIMEOUT", "5")),
+        "timeout": float(os.getenv(f"{prefix}_TIMEOUT", "30")),
+        # Longest wait for the next bytes of a response
+        "read_timeout": float(os.getenv(f"{prefix}_READ_TIMEOUT", read_timeout)),
+        # Extra attempts for idempotent requests that never reached the service or got a 502/503/504,
+        # limited to RETRY_BUDGET retries per request on average
+        "retries": int(os.getenv(f"{prefix}_RETRIES", "2")),
+        "retry_budget": float(os.getenv(f"{prefix}_RETRY_BUDGET", "0.2")),
+        # Consecutive failures that open the breaker, and how long it stays open
+        "breaker_failures": int(os.getenv(f"{prefix}_BREAKER_FAILURES", "5")),
+        "breaker_reset": float(os.getenv(f"{prefix}_BREAKER_RESET", "30")),
+        # Pipe bodies chunk by chunk instead of buffering them in the gateway
+        "stream": os.getenv(f"{prefix}_STREAM", "true").lower() == "true",
+    }
+
+SERVICES = {
+    "auth": service_config("auth", "AUTH_SERVICE_URL", "http://localhost:8001"),
+    "patients": service_config("patients", "PATIENT_SERVICE_URL", "http://localhost:8002"),
+    "doctors": service_config("doctors", "DOCTOR_SERVICE_URL", "http://localhost:8003"),
+    # Change feed long-polls hold a response for up to FEED_MAX_WAIT_SECONDS (30s)
+    "records": service_config("records", "RECORDS_SERVICE_URL", "http://localhost:8004", read_timeout="35"),
+}
+
+# Opt-in response caching for GETs that rarely change; the upstream path must match in full.
+# Set a TTL to 0 to switch a route off.
+CACHED_ROUTES = [
+    CachedRoute("doctors", r"/doctors(/\d+)?", float(os.getenv("DOCTORS_CACHE_TTL", "300"))),
+    CachedRoute("patients", r"/patients/\d+", float(os.getenv("PATIENTS_CACHE_TTL", "30"))),
+]
+response_cache = ResponseCache(
+    CACHED_ROUTES,
+    maxsize=int(os.getenv("GATEWAY_CACHE_SIZE", "1000")),
+    max_body=int(os.getenv("GATEWAY_CACHE_MAX_BODY", str(1024 * 1024))),
+)
+
+# Optional gateway authentication: with GATEWAY_IDENTITY_SECRET set (the same value on
+# the services), bearer tokens are verified here once and the services receive a signed
+# X-Gateway-Identity header they trust instead of checking the token again.
+# The auth service owns tokens and never gets the header.
+gateway_auth = GatewayAuth(
+    jwt_secret=os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production"),
+    algorithm=os.getenv("JWT_ALGORITHM", "HS256"),
+    identity_secret=os.getenv("GATEWAY_IDENTITY_SECRET", ""),
+    identity_ttl=float(os.getenv("GATEWAY_IDENTITY_TTL", "60")),
+    cache_size=int(os.getenv("TOKEN_CACHE_SIZE", "10000")),
+    cache_ttl=float(os.getenv("TOKEN_CACHE_TTL", "300")),
+)
+IDENTITY_SERVICES = {"patients", "doctors", "records"}
+
+def identity_headers(service: str, authorization) -> list:
+    identity = gateway_auth.identity_header(authorization) if service in IDENTITY_SERVICES else None
+    return [(IDENTITY_HEADER, identity)] if identity else []
+
+# One long-lived connection pool per upstream service, plus a separate one for its change feeds
+clients = {}
+feed_clients = {}
+
+# Long-polls and server-sent event streams; the upstream path must match in full
+FEED_PATHS = re.compile(os.getenv("GATEWAY_FEED_PATHS", r".*/changes(/stream)?"))
+
+breakers = {
+    name: CircuitBreaker(config["breaker_failures"], config["breaker_reset"]) for name, config in SERVICES.items()
+}
+retry_budgets = {name: RetryBudget(config["retry_budget"]) for name, config in SERVICES.items()}
+
+def create_client(config: dict, feed: bool = False) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=config["url"],
+        limits=httpx.Limits(
+            max_connections=config["feed_max_connections" if feed else "max_connections"],
+            max_keepalive_connections=config["max_keepalive_connections"],
+            keepalive_expiry=config["keepalive_expiry"],
+        ),
+        timeout=httpx.Timeout(config["timeout"], connect=config["connect_timeout"], read=config["read_timeout"]),
+    )
+
+# Hop-by-hop headers (RFC 7230 section 6.1) only apply to a single connection
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "trailers", "transfer-encoding", "upgrade",
+}
+
+def filter_headers(headers, exclude=()) -> list:
+    excluded = HOP_BY_HOP_HEADERS | set(exclude)
+    # Headers listed in Connection are hop-by-hop as well
+    for name in headers.get("connection", "").split(","):
+        excluded.add(name.strip().lower())
+    return [(key, value) for key, value in headers.items() if key.lower() not in excluded]
+
+def get_client(service: str, feed: bool = False) -> httpx.AsyncClient:
+    pool = feed_clients if feed else clients
+    client = pool.get(service)
+    if client is None:
+        # Normally created at startup; this covers apps mounted without lifespan
+        client = pool[service] = create_client(SERVICES[service], feed)
+    return client
+
+# Methods that may be sent twice without changing the outcome
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Errors where the request never reached the service, and statuses that mean "try again";
+# read timeouts are not retried, the service may still be working on it
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+RETRYABLE_STATUS = {502, 503, 504}
+RETRY_BACKOFF = float(os.getenv("GATEWAY_RETRY_BACKOFF", "0.05"))
+# Seconds a caller is asked to wait when no pooled connection frees up in time
+POOL_RETRY_AFTER = int(os.getenv("GATEWAY_POOL_RETRY_AFTER", "1"))
+
+async def send_upstream(service: str, method: str, path: str, headers, content=None, params=None,
+                        stream: bool = False, feed: bool = False) -> httpx.Response:
+    """Send one request through the service's circuit breaker, retrying within its budget.
+
+    Raises 503 while the breaker is open or the connection pool is full, 504 on
+    timeouts and 502 when the service cannot be reached. Change feeds (``feed=True``) use their own pool.
+    """
+    client = get_client(service, feed)
+    breaker = breakers[service]
+    budget = retry_budgets[service]
+    # A streamed request body cannot be replayed
+    retryable = method in IDEMPOTENT_METHODS and not hasattr(content, "__aiter__")
+    budget.deposit()
+    attempt = 0
+
+    def may_retry() -> bool:
+        # Once the breaker has opened, the caller gets this failure rather than a 503
+        return retryable and attempt < SERVICES[service]["retries"] and breaker.state != breaker.OPEN
+
+    while True:
+        try:
+            breaker.before_call()
+        except CircuitOpen as e:
+            raise HTTPException(
+                status_code=503,
+                detail=f"{service} service unavailable",
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            )
+
+        try:
+            upstream_request = client.build_request(method, path, headers=headers, content=content, params=params)
+            response = await client.send(upstream_request, stream=stream)
+        except httpx.PoolTimeout:
+            # Every pooled connection is busy: the gateway is saturated, not the service
+            breaker.record_skipped()
+            raise HTTPException(
+                status_code=503,
+                detail=f"{service} service busy",
+                headers={"Retry-After": str(POOL_RETRY_AFTER)},
+            )
+        except httpx.TransportError as e:
+            breaker.record_failure()
+            if not (isinstance(e, RETRYABLE_ERRORS) and may_retry() and budget.withdraw()):
+                status_code = 504 if isinstance(e, httpx.TimeoutException) else 502
+                raise HTTPException(status_code=status_code, detail=f"{service} service: {str(e) or type(e).__name__}")
+        else:
+            if response.status_code == 503 and "retry-after" in response.headers:
+                # Deliberate load shedding: the service is up and asked callers to back off,
+                # so neither retry nor blame it
+                breaker.record_skipped()
+                return response
+            if response.status_code not in RETRYABLE_STATUS:
+                breaker.record_success()
+                return response
+            breaker.record_failure()
+            if not (may_retry() and budget.withdraw()):
+                return response
+            await response.aclose()
+
+        attempt += 1
+        # Full jitter keeps retries from many callers from arriving together
+        await asyncio.sleep(random.uniform(0, RETRY_BACKOFF * 2 ** attempt))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    for name, config in SERVICES.items():
+        clients[name] = create_client(config)
+        feed_clients[name] = create_client(config, feed=True)
+    yield
+    for pool in (clients, feed_clients):
+        for client in pool.values():
+            await client.aclose()
+        pool.clear()
+
+app = FastAPI(title="Hospital API Gateway", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,53 +218,133 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-SERVICES = {
-    "auth": os.getenv("AUTH_SERVICE_URL", "http://localhost:8001"),
-    "patients": os.getenv("PATIENT_SERVICE_URL", "http://localhost:8002"),
-    "doctors": os.getenv("DOCTOR_SERVICE_URL", "http://localhost:8003"),
-    "records": os.getenv("RECORDS_SERVICE_URL", "http://localhost:8004"),
-}
+def caller_identity(request: Request) -> str:
+    return hashlib.sha256(request.headers.get("authorization", "").encode()).hexdigest()
+
+def request_key(service: str, path: str, request: Request) -> tuple:
+    return (request.method, service, path, tuple(sorted(request.query_params.multi_items())), caller_identity(request))
+
+def invalidate_cache(service: str, path: str, request: Request, status_code: int):
+    # A successful write makes every cached view of that resource stale
+    if request.method != "GET" and 200 <= status_code < 300:
+        response_cache.invalidate(service, path)
+
+# Request headers besides the caller's credentials that change what upstream answers
+COALESCE_VARY_HEADERS = ("accept", "if-none-match", "if-modified-since")
+COALESCE_GETS = os.getenv("GATEWAY_COALESCE_GETS", "true").lower() == "true"
+
+# Opt-in coalescing for small GETs that many clients poll at once; the upstream path must
+# match in full. Their responses are buffered, so everything else keeps streaming.
+# Cached routes are always coalesced on a miss.
+COALESCED_ROUTES = [
+    CoalescedRoute("records", r"/prescriptions"),
+]
+
+# Identical GETs in flight at the same time share one upstream call
+single_flight = SingleFlight(COALESCED_ROUTES)
+
+async def fetch_shared(service: str, path: str, request: Request, headers: list) -> httpx.Response:
+    key = request_key(service, path, request) + tuple(request.headers.get(name, "") for name in COALESCE_VARY_HEADERS)
+    fetch = lambda: send_upstream(service, "GET", path, headers, params=request.query_params.multi_items())
+    try:
+        return await single_flight.do(key, fetch) if COALESCE_GETS else await fetch()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def buffered_response(response: httpx.Response, extra_headers=()) -> Response:
+    # httpx already decoded the body, so the upstream length/encoding no longer apply
+    headers = filter_headers(response.headers, exclude={"content-length", "content-encoding"})
+    return Response(
+        content=response.content,
+        status_code=response.status_code,
+        headers=dict([*headers, *extra_headers]),
+    )
+
+async def cached_get(service: str, path: str, request: Request, headers: list, ttl: float):
+    key = request_key(service, path, request)
+    # A client asking for a fresh copy skips the lookup but still refreshes the entry
+    if "no-cache" not in parse_cache_control(request.headers.get("cache-control")):
+        cached = response_cache.get(key)
+        if cached is not None:
+            age = int(time.monotonic() - cached.stored_at)
+            return Response(
+                content=cached.content,
+                status_code=cached.status_code,
+                headers={**dict(cached.headers), "age": str(age), "x-cache": "HIT"},
+            )
+
+    response = await fetch_shared(service, path, request, headers)
+    response_headers = filter_headers(response.headers, exclude={"content-length", "content-encoding"})
+    if response.status_code == 200:
+        ttl = response_ttl(ttl, response.headers.get("cache-control"))
+        response_cache.put(key, response.status_code, response_headers, response.content, ttl)
+    return buffered_response(response, [("x-cache", "MISS")])
 
 async def forward_request(service: str, path: str, request: Request):
-    service_url = SERVICES.get(service)
-    if not service_url:
+    if service not in SERVICES:
         raise HTTPException(status_code=404, detail="Service not found")
     
-    url = f"{service_url}{path}"
-    headers = dict(request.headers)
-    headers.pop("host", None)
-    headers.pop("content-length", None) 
-    
-    body = None
-    if request.method in ["POST", "PUT", "PATCH"]:
-        body = await request.body()
+    # Content-Length is kept so upstream receives the streamed body un-chunked
+    headers = filter_headers(request.headers, exclude={"host", IDENTITY_HEADER})
+    headers += identity_headers(service, request.headers.get("authorization"))
+
+    # Change feeds are always streamed: an event stream never finishes, and a
+    # long-poll shares its wait with nobody
+    feed = FEED_PATHS.fullmatch(path) is not None
+
+    # Cached and coalesced GETs are buffered, whatever the service's stream setting
+    if request.method == "GET" and not feed:
+        route = response_cache.route_for(service, path)
+        if route is not None:
+            return await cached_get(service, path, request, headers, route.ttl)
+        if COALESCE_GETS and single_flight.route_for(service, path) is not None:
+            return buffered_response(await fetch_shared(service, path, request, headers))
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.request(
-                method=request.method,
-                url=url,
-                headers=headers,
-                content=body,
-                params=request.query_params
+    has_body = request.method in ["POST", "PUT", "PATCH"]
+    try:
+        if SERVICES[service]["stream"] or feed:
+            response = await send_upstream(
+                service,
+                request.method,
+                path,
+                headers,
+                content=request.stream() if has_body else None,
+                params=request.query_params.multi_items(),
+                stream=True,
+                feed=feed
             )
-            # Return raw content to preserve original response (HTML, Text, or JSON)
-            return Response(
-                content=response.content,
+            invalidate_cache(service, path, request, response.status_code)
+            # Raw (still encoded) bytes, so upstream Content-Length/Encoding stay valid
+            streaming_response = StreamingResponse(
+                response.aiter_raw(),
                 status_code=response.status_code,
-                headers=dict(response.headers)
+                background=BackgroundTask(response.aclose)
             )
-        except Exception as e:
-            # More robust error handling for JSON decode
-            try:
-                error_content = {"detail": str(e)}
-            except:
-                error_content = {"detail": "Unknown error in gateway"}
-            raise HTTPException(status_code=500, detail=str(e))
+            for key, value in filter_headers(response.headers):
+                streaming_response.headers.append(key, value)
+            return streaming_response
+
+        response = await send_upstream(
+            service,
+            request.method,
+            path,
+            headers,
+            content=await request.body() if has_body else None,
+            params=request.query_params.multi_items()
+        )
+        invalidate_cache(service, path, request, response.status_code)
+        # Return raw content to preserve original response (HTML, Text, or JSON)
+        return buffered_response(response)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 # --- ROUTES ---
 
-@app.api_route("/api/prescriptions/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
+@app.api_route("/api/prescriptions/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
 async def prescriptions_gateway(path: str, request: Request):
     # Route /api/prescriptions/XYZ -> records-service /prescriptions/XYZ
     # Handle root case /api/prescriptions -> records-service /prescriptions
@@ -90,13 +374,73 @@ async def doctors_gateway(path: str, request: Request):
 async def records_gateway(path: str, request: Request):
     return await forward_request("records", f"/{path}", request)
 
+# --- DASHBOARD ---
+
+# Stats endpoints behind the dashboard cards: (service, path)
+DASHBOARD_SOURCES = {
+    "patients": ("patients", "/patients/stats"),
+    "doctors": ("doctors", "/doctors/stats"),
+    "records": ("records", "/records/stats"),
+    "prescriptions": ("records", "/prescriptions/stats"),
+}
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "10"))
+DASHBOARD_CACHE_SIZE = 1000
+
+# Keyed by a hash of the caller's Authorization header -> (expires_at, summary)
+dashboard_cache = {}
+
+@app.get("/dashboard/summary")
+async def dashboard_summary(request: Request):
+    authorization = request.headers.get("authorization", "")
+    cache_key = caller_identity(request)
+    now = time.monotonic()
+    cached = dashboard_cache.get(cache_key)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    headers = [("Authorization", authorization)] if authorization else []
+    responses = await asyncio.gather(
+        *(send_upstream(service, "GET", path, headers + identity_headers(service, authorization))
+          for service, path in DASHBOARD_SOURCES.values()),
+        return_exceptions=True
+    )
+
+    summary = {}
+    for name, response in zip(DASHBOARD_SOURCES, responses):
+        if isinstance(response, Exception):
+            summary[name] = None
+        elif response.status_code == 401:
+            raise HTTPException(status_code=401, detail=f"{name}: {response.text}")
+        else:
+            summary[name] = response.json() if response.status_code == 200 else None
+
+    # Only complete summaries are cached, so a failing service is retried next time
+    if all(value is not None for value in summary.values()):
+        if len(dashboard_cache) >= DASHBOARD_CACHE_SIZE:
+            for key in [key for key, (expires_at, _) in dashboard_cache.items() if expires_at <= now]:
+                del dashboard_cache[key]
+            if len(dashboard_cache) >= DASHBOARD_CACHE_SIZE:
+                dashboard_cache.pop(next(iter(dashboard_cache)))
+        dashboard_cache[cache_key] = (now + DASHBOARD_CACHE_TTL, summary)
+    return summary
+
 @app.get("/")
 def read_root():
     return {"message": "Hospital API Gateway ready"}
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok"}
+    upstreams = {
+        name: {**breakers[name].snapshot(), "retry_budget": retry_budgets[name].snapshot()} for name in SERVICES
+    }
+    degraded = any(upstream["state"] != CircuitBreaker.CLOSED for upstream in upstreams.values())
+    return {
+        "status": "degraded" if degraded else "ok",
+        "upstreams": upstreams,
+        "response_cache": response_cache.snapshot(),
+        "single_flight": single_flight.snapshot(),
+        "gateway_auth": gateway_auth.snapshot(),
+    }
 
 if __name__ == "__main__":
     import uvicorn
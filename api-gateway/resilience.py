@@ -0,0 +1,106 @@
+import time
+
+
+class CircuitOpen(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"circuit open, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Stops calling a service after ``failure_threshold`` failures in a row.
+
+    While open every call fails fast. After ``reset_timeout`` seconds one trial
+    call is let through (half-open): success closes the breaker, failure opens
+    it for another period.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_started_at = None
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def before_call(self):
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            remaining = self.opened_at + self.reset_timeout - now
+            if remaining > 0:
+                self.stats["rejected"] += 1
+                raise CircuitOpen(remaining)
+            self.state = self.HALF_OPEN
+            self.trial_started_at = None
+        if self.state == self.HALF_OPEN:
+            # A trial that never reported back (caller went away) is replaced after a period
+            if self.trial_started_at is not None and now - self.trial_started_at < self.reset_timeout:
+                self.stats["rejected"] += 1
+                raise CircuitOpen(self.trial_started_at + self.reset_timeout - now)
+            self.trial_started_at = now
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trial_started_at = None
+
+    def record_skipped(self):
+        # The call never reached the service: nothing learned, but a trial slot is handed back
+        if self.state == self.HALF_OPEN:
+            self.trial_started_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.stats["opened"] += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.trial_started_at = None
+
+    def snapshot(self) -> dict:
+        # An open breaker whose period is over will let the next call through
+        state = self.state
+        if state == self.OPEN and time.monotonic() >= self.opened_at + self.reset_timeout:
+            state = self.HALF_OPEN
+        return {"state": state, "consecutive_failures": self.failures, **self.stats}
+
+
+class RetryBudget:
+    """Token bucket that caps retries to a share of the traffic.
+
+    Every request deposits ``ratio`` tokens and every retry spends one, with
+    ``min_per_second`` trickling in so a quiet service can still retry. When a
+    service is down the budget runs dry instead of multiplying its load.
+    """
+
+    def __init__(self, ratio: float, min_per_second: float = 1.0, capacity: float = 100.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.capacity = capacity
+        self.tokens = min(capacity, 10 * min_per_second)
+        self.updated_at = time.monotonic()
+        self.stats = {"retries": 0, "exhausted": 0}
+
+    def _refill(self, amount: float):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def deposit(self):
+        self._refill(self.ratio)
+
+    def withdraw(self) -> bool:
+        now = time.monotonic()
+        self._refill((now - self.updated_at) * self.min_per_second)
+        self.updated_at = now
+        if self.tokens < 1:
+            self.stats["exhausted"] += 1
+            return False
+        self.tokens -= 1
+        self.stats["retries"] += 1
+        return True
+
+    def snapshot(self) -> dict:
+        return {"tokens": round(self.tokens, 2), **self.stats}
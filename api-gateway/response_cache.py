@@ -0,0 +1,113 @@
+import re
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+
+class CachedRoute(NamedTuple):
+    """A GET route whose responses may be cached: ``pattern`` must match the whole upstream path."""
+    service: str
+    pattern: str
+    ttl: float
+
+
+class CachedResponse(NamedTuple):
+    status_code: int
+    headers: list
+    content: bytes
+    stored_at: float
+    expires_at: float
+
+
+def parse_cache_control(value: Optional[str]) -> dict:
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def response_ttl(route_ttl: float, cache_control: Optional[str]) -> float:
+    """How long a response may be kept: the route TTL, capped by upstream Cache-Control.
+
+    ``no-store``/``no-cache`` mean not at all; ``s-maxage`` (meant for shared
+    caches like this one) wins over ``max-age``.
+    """
+    directives = parse_cache_control(cache_control)
+    if "no-store" in directives or "no-cache" in directives:
+        return 0
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            try:
+                return min(route_ttl, max(0, int(directives[name])))
+            except (TypeError, ValueError):
+                return 0
+    return route_ttl
+
+
+def resource_of(path: str) -> str:
+    """The collection a path belongs to: /doctors/5 and /doctors?skip=10 -> doctors."""
+    return path.strip("/").split("/", 1)[0]
+
+
+class ResponseCache:
+    """In-memory LRU of upstream GET responses, each with its own expiry.
+
+    Keys are (method, service, path, query, identity) so one caller's data is
+    never served to another. A successful write to a resource drops every
+    entry for that resource (detail, list and search pages alike).
+    """
+
+    def __init__(self, routes, maxsize: int, max_body: int):
+        # A TTL of 0 switches a route off
+        self.routes = [(route, re.compile(route.pattern)) for route in routes if route.ttl > 0]
+        self.maxsize = maxsize
+        self.max_body = max_body
+        self._entries = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0, "evictions": 0}
+
+    def route_for(self, service: str, path: str) -> Optional[CachedRoute]:
+        for route, pattern in self.routes:
+            if route.service == service and pattern.fullmatch(path):
+                return route
+        return None
+
+    def get(self, key) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            del self._entries[key]
+            entry = None
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry
+
+    def put(self, key, status_code: int, headers: list, content: bytes, ttl: float):
+        if ttl <= 0 or len(content) > self.max_body:
+            return
+        now = time.monotonic()
+        self._entries[key] = CachedResponse(status_code, headers, content, now, now + ttl)
+        self._entries.move_to_end(key)
+        self.stats["stores"] += 1
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, service: str, path: str) -> int:
+        resource = resource_of(path)
+        stale = [key for key in self._entries if key[1] == service and resource_of(key[2]) == resource]
+        for key in stale:
+            del self._entries[key]
+        self.stats["invalidations"] += len(stale)
+        return len(stale)
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else None,
+        }
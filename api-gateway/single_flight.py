@@ -0,0 +1,48 @@
+import asyncio
+import re
+from typing import NamedTuple, Optional
+
+
+class CoalescedRoute(NamedTuple):
+    """A GET route where identical requests in flight share one call: ``pattern`` must match the whole upstream path."""
+    service: str
+    pattern: str
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; callers arriving meanwhile share its result.
+
+    The call runs as its own task, so a caller that goes away (client
+    disconnect) does not cancel it for the others still waiting.
+    """
+
+    def __init__(self, routes=()):
+        self.routes = [(route, re.compile(route.pattern)) for route in routes]
+        self._calls = {}
+        self.stats = {"leaders": 0, "shared": 0}
+
+    def route_for(self, service: str, path: str) -> Optional[CoalescedRoute]:
+        for route, pattern in self.routes:
+            if route.service == service and pattern.fullmatch(path):
+                return route
+        return None
+
+    async def do(self, key, call):
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(call())
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.stats["leaders"] += 1
+        else:
+            self.stats["shared"] += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark a failure as seen even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "in_flight": len(self._calls)}
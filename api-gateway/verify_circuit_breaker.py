@@ -0,0 +1,156 @@
+import os
+import time
+
+# No backoff sleeps between retries in this script
+os.environ["GATEWAY_RETRY_BACKOFF"] = "0"
+
+import httpx
+from fastapi.testclient import TestClient
+
+import main
+from resilience import CircuitBreaker, RetryBudget
+
+client = TestClient(main.app)
+
+class Upstream:
+    """Doctor service double: each call takes the next behaviour from a script."""
+
+    def __init__(self):
+        self.calls = []
+        self.script = []
+
+    def handler(self, request: httpx.Request):
+        self.calls.append(request.method)
+        behaviour = self.script.pop(0) if self.script else 200
+        if isinstance(behaviour, Exception):
+            raise behaviour
+        status, headers = behaviour if isinstance(behaviour, tuple) else (behaviour, {})
+        return httpx.Response(status, headers=headers, stream=httpx.ByteStream(b'{"doctor_id": 1}'))
+
+upstream = Upstream()
+
+def use_upstream(failures=3, reset=0.2, ratio=0.2):
+    upstream.calls.clear()
+    upstream.script.clear()
+    main.clients["doctors"] = httpx.AsyncClient(transport=httpx.MockTransport(upstream.handler), base_url="http://doctors")
+    main.breakers["doctors"] = CircuitBreaker(failures, reset)
+    main.retry_budgets["doctors"] = RetryBudget(ratio)
+    main.response_cache._entries.clear()
+
+def connect_error():
+    return httpx.ConnectError("connection refused")
+
+def test_retries_idempotent_requests():
+    use_upstream()
+    upstream.script = [connect_error(), 503]
+    response = client.get("/doctors/doctors/1")
+    assert response.status_code == 200 and len(upstream.calls) == 3
+
+    # A POST that failed to connect is not sent again
+    upstream.calls.clear()
+    upstream.script = [connect_error()]
+    assert client.post("/doctors/doctors", json={}).status_code == 502
+    assert upstream.calls == ["POST"]
+
+    # Read timeouts are not retried: the service may still be working on it
+    upstream.calls.clear()
+    upstream.script = [httpx.ReadTimeout("timed out")]
+    assert client.get("/doctors/doctors").status_code == 504
+    assert len(upstream.calls) == 1
+    print("Bounded retries for idempotent requests: OK")
+
+def test_breaker_opens_and_recovers():
+    use_upstream(failures=3, reset=0.2)
+    upstream.script = [503] * 3
+    # Retries are part of the same run of failures
+    assert client.delete("/doctors/doctors/1").status_code == 503
+    assert len(upstream.calls) == 3
+
+    response = client.get("/doctors/doctors/1")
+    assert response.status_code == 503 and "retry-after" in response.headers
+    assert len(upstream.calls) == 3
+    health = client.get("/health").json()
+    assert health["status"] == "degraded"
+    assert health["upstreams"]["doctors"]["state"] == "open"
+    assert health["upstreams"]["patients"]["state"] == "closed"
+
+    # After the reset period one trial call goes through and closes it again
+    time.sleep(0.25)
+    assert client.get("/doctors/doctors/1").status_code == 200
+    assert main.breakers["doctors"].state == CircuitBreaker.CLOSED
+    assert client.get("/health").json()["status"] == "ok"
+
+    # A failing trial opens it straight away, without retrying into the open breaker
+    upstream.script = [connect_error()] * 3
+    assert client.get("/doctors/doctors").status_code == 502
+    assert main.breakers["doctors"].state == CircuitBreaker.OPEN
+    time.sleep(0.25)
+    upstream.script = [connect_error()]
+    before = len(upstream.calls)
+    assert client.get("/doctors/doctors/2").status_code == 502
+    assert len(upstream.calls) == before + 1
+    assert client.get("/doctors/doctors/3").status_code == 503
+    print("Breaker opens, fails fast and recovers: OK")
+
+def test_pool_exhaustion_leaves_breaker_alone():
+    use_upstream(failures=1)
+    upstream.script = [httpx.PoolTimeout("pool full")] * 3
+    for _ in range(3):
+        response = client.get("/doctors/doctors/1")
+        assert response.status_code == 503 and response.headers["retry-after"] == "1"
+    # Not retried, and the service is not blamed for the gateway's own saturation
+    assert len(upstream.calls) == 3
+    assert main.breakers["doctors"].state == CircuitBreaker.CLOSED
+    assert client.get("/doctors/doctors/1").status_code == 200
+
+    # A half-open trial that never got a connection does not hold up the next one
+    main.breakers["doctors"].record_failure()
+    time.sleep(0.25)
+    upstream.script = [httpx.PoolTimeout("pool full")]
+    assert client.get("/doctors/doctors/2").status_code == 503
+    assert client.get("/doctors/doctors/2").status_code == 200
+    assert main.breakers["doctors"].state == CircuitBreaker.CLOSED
+    print("Pool timeouts answer 503 without tripping the breaker: OK")
+
+def test_load_shedding_leaves_breaker_alone():
+    use_upstream(failures=2)
+    shed = (503, {"Retry-After": "2"})
+    upstream.script = [shed] * 5
+    for _ in range(5):
+        response = client.post("/doctors/doctors", json={})
+        assert response.status_code == 503 and response.headers["retry-after"] == "2"
+    # Passed on as they are: not retried, and the breaker stays closed
+    upstream.script = [shed]
+    assert client.get("/doctors/doctors/4").status_code == 503
+    assert len(upstream.calls) == 6
+    assert main.breakers["doctors"].state == CircuitBreaker.CLOSED
+    assert client.get("/doctors/doctors/4").status_code == 200
+    print("Load-shedding 503s with Retry-After do not trip the breaker: OK")
+
+def test_retry_budget_caps_retries():
+    use_upstream(failures=10_000, ratio=0.25)
+    main.retry_budgets["doctors"].tokens = 0
+    main.retry_budgets["doctors"].min_per_second = 0
+    upstream.script = [503] * 100
+    for i in range(50):
+        client.get("/doctors/doctors", params={"page": i})
+    # 50 requests at 0.25 tokens each buy 12 retries instead of 100
+    assert len(upstream.calls) == 62
+    budget = client.get("/health").json()["upstreams"]["doctors"]["retry_budget"]
+    assert budget["retries"] == 12
+    print("Retry budget limits retries to a share of traffic:", budget)
+
+def test_timeouts_are_configured():
+    timeout = main.create_client(main.SERVICES["records"]).timeout
+    assert timeout.connect == 5 and timeout.read == 35
+    assert main.create_client(main.SERVICES["doctors"]).timeout.read == 30
+    print("Connect/read timeouts per service: OK")
+
+if __name__ == "__main__":
+    test_retries_idempotent_requests()
+    test_breaker_opens_and_recovers()
+    test_pool_exhaustion_leaves_breaker_alone()
+    test_load_shedding_leaves_breaker_alone()
+    test_retry_budget_caps_retries()
+    test_timeouts_are_configured()
+    print("Verification SUCCESS!")
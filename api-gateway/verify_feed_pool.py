@@ -0,0 +1,73 @@
+import asyncio
+import os
+import socket
+import threading
+import time
+
+# A records pool small enough for two open dashboards to fill it
+os.environ["RECORDS_MAX_CONNECTIONS"] = "2"
+os.environ["RECORDS_TIMEOUT"] = "2"
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+import main
+
+# Stand-in records service with an endless change stream
+upstream = FastAPI()
+
+@upstream.get("/prescriptions/changes/stream")
+async def changes_stream():
+    async def events():
+        while True:
+            yield ": heartbeat\n\n"
+            await asyncio.sleep(0.1)
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@upstream.get("/prescriptions/changes")
+async def poll_changes(cursor: int = 0):
+    await asyncio.sleep(1)
+    return {"events": [], "cursor": cursor}
+
+@upstream.get("/prescriptions/stats")
+async def stats():
+    return {"total": 0}
+
+def serve(app) -> str:
+    # Real sockets, so open streams actually hold on to pooled connections
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+async def test_open_streams_leave_the_pool_alone(gateway):
+    async with gateway.stream("GET", "/api/prescriptions/changes/stream") as first, \
+            gateway.stream("GET", "/api/prescriptions/changes/stream") as second:
+        # Headers are in, so each stream now holds an upstream connection
+        assert first.status_code == second.status_code == 200
+
+        # Two long-polls on top, still leaving room for ordinary requests
+        polls = [asyncio.create_task(gateway.get("/api/prescriptions/changes", params={"cursor": 7})) for _ in range(2)]
+        for _ in range(5):
+            response = await gateway.get("/api/prescriptions/stats")
+            assert response.status_code == 200, response.text
+        assert all(r.json() == {"events": [], "cursor": 7} for r in await asyncio.gather(*polls))
+
+    health = (await gateway.get("/health")).json()
+    assert health["upstreams"]["records"]["state"] == "closed"
+    print("2 open streams + 2 long-polls, stats still answered, breaker closed: OK")
+
+async def run():
+    main.SERVICES["records"]["url"] = serve(upstream)
+    gateway_url = serve(main.app)
+    async with httpx.AsyncClient(base_url=gateway_url, timeout=10) as gateway:
+        await test_open_streams_leave_the_pool_alone(gateway)
+
+if __name__ == "__main__":
+    asyncio.run(run())
+    print("Verification SUCCESS!")
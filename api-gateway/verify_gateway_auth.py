@@ -0,0 +1,101 @@
+import asyncio
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+
+# Gateway and patient service share the identity key; the patient service runs on a throwaway database
+os.environ["GATEWAY_IDENTITY_SECRET"] = "verify-identity-secret"
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/verify_gateway_auth.db"
+
+import httpx
+from fastapi import FastAPI, Request
+from jose import jwt
+
+import main
+from identity import IDENTITY_HEADER, sign_identity
+
+# The real patient service, loaded under another name next to the gateway's main
+PATIENT_SERVICE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "2-patient-service")
+sys.path.append(PATIENT_SERVICE)
+spec = importlib.util.spec_from_file_location("patient_main", os.path.join(PATIENT_SERVICE, "main.py"))
+patient_main = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(patient_main)
+import migrate
+import token_verifier
+
+migrate.upgrade()
+
+# Stand-in auth service that echoes what it received
+auth = FastAPI()
+
+@auth.get("/me")
+def me(request: Request):
+    return {"identity": request.headers.get(IDENTITY_HEADER)}
+
+token_checks = []
+
+async def checked_verify(token):
+    token_checks.append(token)
+    return {"valid": True, "email": "checked@service", "role": "admin"}
+
+def bearer(sub="alice@hospital.com", role="admin", exp_in=3600, key=main.gateway_auth.jwt_secret):
+    token = jwt.encode({"sub": sub, "role": role, "exp": int(time.time() + exp_in)}, key, algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+async def test_services_trust_the_gateway(gateway):
+    headers = bearer()
+    for _ in range(3):
+        response = await gateway.get("/patients/patients", headers=headers)
+        assert response.status_code == 200, response.text
+    assert token_checks == []
+    stats = main.gateway_auth.snapshot()
+    assert stats["verified"] == 1 and stats["cache_hits"] == 2
+    print("Token verified once at the gateway, not by the service:", stats)
+
+async def test_other_tokens_are_left_to_the_service(gateway):
+    # Not verifiable at the gateway: forwarded without an identity, the service decides
+    response = await gateway.get("/patients/patients", headers={"Authorization": "Bearer internal_bypass"})
+    assert response.status_code == 200
+    await gateway.get("/patients/patients", headers=bearer(key="some-other-key"))
+    assert len(token_checks) == 1
+
+    # The auth service never gets an identity header
+    response = await gateway.get("/auth/me", headers=bearer())
+    assert response.json() == {"identity": None}
+    print("Bypass/unknown tokens and the auth service untouched: OK")
+
+async def test_forged_identities_are_rejected(gateway, service):
+    forged = sign_identity({"sub": "mallory@hospital.com", "role": "admin"}, "guessed-secret", 60)
+    response = await gateway.get("/patients/patients", headers={IDENTITY_HEADER: forged})
+    assert response.status_code == 401
+
+    # Straight to the service: a client-supplied header is only honored with a valid signature
+    genuine = sign_identity({"sub": "alice@hospital.com", "role": "admin"}, main.gateway_auth.identity_secret, 60)
+    assert (await service.get("/patients", headers={IDENTITY_HEADER: genuine})).status_code == 200
+    assert (await service.get("/patients", headers={IDENTITY_HEADER: forged})).status_code == 401
+    payload, signature = genuine.split(".")
+    tampered = f"{payload[:-2]}xx.{signature}"
+    assert (await service.get("/patients", headers={IDENTITY_HEADER: tampered})).status_code == 401
+    expired = sign_identity(
+        {"sub": "alice@hospital.com", "role": "admin", "exp": time.time() - 1}, main.gateway_auth.identity_secret, 60
+    )
+    assert (await service.get("/patients", headers={IDENTITY_HEADER: expired})).status_code == 401
+    print("Forged, tampered and expired identity headers rejected: OK")
+
+async def run():
+    token_verifier.verify = checked_verify
+    main.clients["patients"] = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=patient_main.app), base_url="http://patients"
+    )
+    main.clients["auth"] = httpx.AsyncClient(transport=httpx.ASGITransport(app=auth), base_url="http://auth")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://gateway") as gateway, \
+            httpx.AsyncClient(transport=httpx.ASGITransport(app=patient_main.app), base_url="http://patients") as service:
+        await test_services_trust_the_gateway(gateway)
+        await test_other_tokens_are_left_to_the_service(gateway)
+        await test_forged_identities_are_rejected(gateway, service)
+
+if __name__ == "__main__":
+    asyncio.run(run())
+    print("Verification SUCCESS!")
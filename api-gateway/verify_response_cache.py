@@ -0,0 +1,87 @@
+import httpx
+from fastapi import FastAPI, Header, Response
+from fastapi.testclient import TestClient
+
+import main
+
+# Stand-in doctor/patient services that count how often they are reached
+upstream = FastAPI()
+calls = {"doctor": 0, "patient": 0}
+doctors = {1: "Dr. Sarah Wilson"}
+
+@upstream.get("/doctors/{doctor_id}")
+def get_doctor(doctor_id: int, authorization: str = Header("")):
+    calls["doctor"] += 1
+    if doctor_id not in doctors:
+        return Response(status_code=404)
+    return {"doctor_id": doctor_id, "name": doctors[doctor_id], "seen_by": authorization}
+
+@upstream.put("/doctors/{doctor_id}")
+def update_doctor(doctor_id: int, body: dict):
+    doctors[doctor_id] = body["name"]
+    return {"doctor_id": doctor_id, "name": doctors[doctor_id]}
+
+@upstream.get("/patients/{patient_id}")
+def get_patient(patient_id: int, response: Response):
+    calls["patient"] += 1
+    response.headers["Cache-Control"] = "no-store"
+    return {"patient_id": patient_id}
+
+client = TestClient(main.app)
+ALICE = {"Authorization": "Bearer alice"}
+BOB = {"Authorization": "Bearer bob"}
+
+def use_upstream():
+    for service in ("doctors", "patients"):
+        main.clients[service] = httpx.AsyncClient(transport=httpx.ASGITransport(app=upstream), base_url="http://upstream")
+
+def test_hits_are_served_from_cache():
+    first = client.get("/doctors/doctors/1", headers=ALICE)
+    second = client.get("/doctors/doctors/1", headers=ALICE)
+    assert first.headers["x-cache"] == "MISS" and second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json()
+    assert calls["doctor"] == 1
+
+    # Other callers, other query strings and misses upstream are kept apart
+    assert client.get("/doctors/doctors/1", headers=BOB).json()["seen_by"] == "Bearer bob"
+    assert client.get("/doctors/doctors/1", params={"x": 1}, headers=ALICE).headers["x-cache"] == "MISS"
+    assert calls["doctor"] == 3
+    client.get("/doctors/doctors/2", headers=ALICE)
+    assert client.get("/doctors/doctors/2", headers=ALICE).status_code == 404
+    assert calls["doctor"] == 5
+
+    # Cache-Control: no-cache from the client forces a refetch
+    assert client.get("/doctors/doctors/1", headers={**ALICE, "Cache-Control": "no-cache"}).headers["x-cache"] == "MISS"
+    assert client.get("/doctors/doctors/1", headers=ALICE).headers["x-cache"] == "HIT"
+    print("Cache hits and keys: OK")
+
+def test_upstream_cache_control():
+    client.get("/patients/patients/1", headers=ALICE)
+    assert client.get("/patients/patients/1", headers=ALICE).headers["x-cache"] == "MISS"
+    assert calls["patient"] == 2
+    print("Upstream no-store is honored: OK")
+
+def test_writes_invalidate():
+    before = calls["doctor"]
+    response = client.put("/doctors/doctors/1", json={"name": "Dr. Sarah Wilson-Chen"}, headers=ALICE)
+    assert response.status_code == 200
+    for headers in (ALICE, BOB):
+        response = client.get("/doctors/doctors/1", headers=headers)
+        assert response.headers["x-cache"] == "MISS"
+        assert response.json()["name"] == "Dr. Sarah Wilson-Chen"
+    assert calls["doctor"] == before + 2
+    print("Writes invalidate the resource: OK")
+
+def test_stats():
+    stats = client.get("/health").json()["response_cache"]
+    assert stats["hits"] == 2 and stats["invalidations"] > 0
+    assert 0 < stats["hit_rate"] < 1
+    print("Counters on /health:", stats)
+
+if __name__ == "__main__":
+    use_upstream()
+    test_hits_are_served_from_cache()
+    test_upstream_cache_control()
+    test_writes_invalidate()
+    test_stats()
+    print("Verification SUCCESS!")
@@ -0,0 +1,116 @@
+import asyncio
+from typing import List
+
+import httpx
+from fastapi import FastAPI, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+import main
+
+# Stand-in records service that is slow enough for polls to overlap
+upstream = FastAPI()
+calls = {"list": 0, "stream": 0, "stats": 0}
+
+@upstream.get("/prescriptions")
+async def list_prescriptions(
+    status: List[str] = Query([]), authorization: str = Header(""), if_none_match: str = Header("")
+):
+    calls["list"] += 1
+    await asyncio.sleep(0.2)
+    if "broken" in status:
+        raise RuntimeError("records is down")
+    if if_none_match == '"v1"':
+        return Response(status_code=304)
+    return {"call": calls["list"], "status": status, "seen_by": authorization}
+
+@upstream.get("/prescriptions/stats")
+async def stats():
+    calls["stats"] += 1
+    await asyncio.sleep(0.1)
+    return {"total": calls["stats"]}
+
+@upstream.api_route("/prescriptions/echo", methods=["GET", "POST"])
+async def echo(request: Request):
+    return request.query_params.multi_items()
+
+@upstream.get("/prescriptions/changes/stream")
+async def changes_stream():
+    calls["stream"] += 1
+
+    async def events():
+        await asyncio.sleep(0.1)
+        yield "data: {}\n\n"
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+ALICE = {"Authorization": "Bearer alice"}
+BOB = {"Authorization": "Bearer bob"}
+
+async def poll(gateway, count, path="/api/prescriptions", **kwargs):
+    return await asyncio.gather(*(gateway.get(path, **kwargs) for _ in range(count)))
+
+async def test_identical_polls_share_one_call(gateway):
+    responses = await poll(gateway, 50, headers=ALICE, params={"status": "pending"})
+    assert calls["list"] == 1
+    assert {r.status_code for r in responses} == {200}
+    assert all(r.json() == {"call": 1, "status": ["pending"], "seen_by": "Bearer alice"} for r in responses)
+
+    # Once it has finished, the next poll goes upstream again
+    await poll(gateway, 5, headers=ALICE, params={"status": "pending"})
+    assert calls["list"] == 2
+    print("50 concurrent polls -> 1 upstream call: OK")
+
+async def test_different_requests_are_not_shared(gateway):
+    before = calls["list"]
+    responses = await asyncio.gather(
+        gateway.get("/api/prescriptions", headers=ALICE),
+        gateway.get("/api/prescriptions", headers=BOB),
+        gateway.get("/api/prescriptions", headers=ALICE, params={"status": "paid"}),
+        gateway.get("/api/prescriptions", headers={**ALICE, "If-None-Match": '"v1"'}),
+    )
+    assert calls["list"] == before + 4
+    assert responses[1].json()["seen_by"] == "Bearer bob"
+    assert responses[0].status_code == 200 and responses[3].status_code == 304
+    print("Auth scope, query and conditional headers are kept apart: OK")
+
+async def test_failures_and_streams(gateway):
+    before = calls["list"]
+    responses = await poll(gateway, 10, params={"status": "broken"})
+    assert calls["list"] == before + 1
+    assert {r.status_code for r in responses} == {500}
+
+    # Routes that did not opt in keep streaming, one upstream call each
+    responses = await poll(gateway, 5, path="/api/prescriptions/stats")
+    assert calls["stats"] == 5
+    assert {r.status_code for r in responses} == {200}
+
+    responses = await poll(gateway, 3, path="/api/prescriptions/changes/stream")
+    assert calls["stream"] == 3
+    assert all(r.text == "data: {}\n\n" for r in responses)
+    assert main.single_flight.snapshot()["in_flight"] == 0
+    print("Failures fan out, other routes and event streams are not shared:", main.single_flight.snapshot())
+
+async def test_repeated_query_keys(gateway):
+    # Coalesced, streamed and buffered requests forward every value, not just the last one
+    params = [("status", "pending"), ("status", "paid"), ("limit", "5")]
+    response = await gateway.get("/api/prescriptions", params=params)
+    assert response.json()["status"] == ["pending", "paid"]
+    for method, stream in (("GET", True), ("GET", False), ("POST", True), ("POST", False)):
+        main.SERVICES["records"]["stream"] = stream
+        response = await gateway.request(method, "/api/prescriptions/echo", params=params)
+        assert response.json() == [list(p) for p in params], response.text
+    main.SERVICES["records"]["stream"] = True
+    print("Repeated query keys forwarded: OK")
+
+async def run():
+    main.clients["records"] = main.feed_clients["records"] = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=upstream, raise_app_exceptions=False), base_url="http://records"
+    )
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://gateway") as gateway:
+        await test_identical_polls_share_one_call(gateway)
+        await test_different_requests_are_not_shared(gateway)
+        await test_failures_and_streams(gateway)
+        await test_repeated_query_keys(gateway)
+
+if __name__ == "__main__":
+    asyncio.run(run())
+    print("Verification SUCCESS!")
@@ -140,48 +140,23 @@ if (authToken) {
 // Load Dashboard Data
 async function loadDashboardData() {
     try {
-        // Load patients count
-        const patientsResponse = await fetch(`${API_URL}/patients/patients`, {
+        // One small request: the gateway fans out to each service's COUNT endpoint
+        const response = await fetch(`${API_URL}/dashboard/summary`, {
             headers: {
                 'Authorization': `Bearer ${authToken}`
             }
         });
-        if (patientsResponse.ok) {
-            const patients = await patientsResponse.json();
-            document.getElementById('totalPatients').textContent = patients.length;
-        }
-
-        // Load doctors count
-        const doctorsResponse = await fetch(`${API_URL}/doctors/doctors`, {
-            headers: {
-                'Authorization': `Bearer ${authToken}`
-            }
-        });
-        if (doctorsResponse.ok) {
-            const doctors = await doctorsResponse.json();
-            document.getElementById('totalDoctors').textContent = doctors.length;
-        }
-
-        // Load records count
-        const recordsResponse = await fetch(`${API_URL}/records/records`, {
-            headers: {
-                'Authorization': `Bearer ${authToken}`
-            }
-        });
-        if (recordsResponse.ok) {
-            const records = await recordsResponse.json();
-            document.getElementById('totalRecords').textContent = records.length;
-        }
-
-        // Load prescriptions count
-        const prescriptionsResponse = await fetch(`${API_URL}/records/prescriptions`, {
-            headers: {
-                'Authorization': `Bearer ${authToken}`
-            }
-        });
-        if (prescriptionsResponse.ok) {
-            const prescriptions = await prescriptionsResponse.json();
-            document.getElementById('totalPrescriptions').textContent = prescriptions.length;
+        if (response.ok) {
+            const summary = await response.json();
+            const cards = {
+                totalPatients: summary.patients,
+                totalDoctors: summary.doctors,
+                totalRecords: summary.records,
+                totalPrescriptions: summary.prescriptions
+            };
+            Object.entries(cards).forEach(([elementId, stats]) => {
+                document.getElementById(elementId).textContent = stats ? stats.total : '-';
+            });
         }
     } catch (error) {
         console.error('Error loading dashboard data:', error);
@@ -663,7 +638,7 @@ async function loadPrescriptions() {
                 }
             });
 
-            // Set up auto-refresh every 5 seconds
+            // Listen for prescription changes instead of polling
             startAutoRefresh();
         }
     } catch (error) {
@@ -671,19 +646,28 @@ async function loadPrescriptions() {
     }
 }
 
-// Store interval ID for cleanup
-let prescriptionRefreshInterval = null;
+// Change feed connection (Server-Sent Events), opened once
+let prescriptionChangeFeed = null;
+let prescriptionReloadTimer = null;
 
 function startAutoRefresh() {
-    // Clear existing interval if any
-    if (prescriptionRefreshInterval) {
-        clearInterval(prescriptionRefreshInterval);
+    if (prescriptionChangeFeed) {
+        return;
     }
 
-    // Refresh every 5 seconds - reload entire prescription list
-    prescriptionRefreshInterval = setInterval(() => {
-        loadPrescriptions();
-    }, 5000);
+    // The records service pushes create/update/delete/status events; an idle
+    // dashboard only holds an open connection instead of re-downloading the list.
+    // EventSource reconnects by itself and resumes from the last event id.
+    prescriptionChangeFeed = new EventSource(`${API_URL}/api/prescriptions/changes/stream`);
+    prescriptionChangeFeed.addEventListener('prescription', () => {
+        // Coalesce bursts of events into a single reload
+        clearTimeout(prescriptionReloadTimer);
+        prescriptionReloadTimer = setTimeout(() => {
+            if (document.getElementById('prescriptionsContent').style.display !== 'none') {
+                loadPrescriptions();
+            }
+        }, 300);
+    });
 }
 
 // Function to check availability in external Pharmacy API
@@ -1,3 +1,9 @@
+-- Postgres bootstrap: one database per service, schema as of the latest
+-- migration in each service's migrations/versions, plus sample data.
+-- The services' `python migrate.py` is the source of truth; it skips tables,
+-- columns and indexes that already exist and stamps the revision, so it is
+-- safe to run after this script.
+
 -- Create databases
 CREATE DATABASE hospital_auth;
 CREATE DATABASE hospital_patients;
@@ -9,27 +15,36 @@ CREATE DATABASE hospital_records;
 
 CREATE TABLE IF NOT EXISTS users (
     id SERIAL PRIMARY KEY,
-    email VARCHAR(255) UNIQUE NOT NULL,
-    full_name VARCHAR(255) NOT NULL,
-    hashed_password VARCHAR(255) NOT NULL,
-    role VARCHAR(50) NOT NULL DEFAULT 'user',
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    email VARCHAR NOT NULL,
+    full_name VARCHAR NOT NULL,
+    hashed_password VARCHAR NOT NULL,
+    role VARCHAR NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
     updated_at TIMESTAMP WITH TIME ZONE
 );
+CREATE INDEX IF NOT EXISTS ix_users_id ON users (id);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email);
 
 -- Connect to hospital_patients
 \c hospital_patients;
 
 CREATE TABLE IF NOT EXISTS patients (
     patient_id SERIAL PRIMARY KEY,
-    name VARCHAR(255) NOT NULL,
-    email VARCHAR(255) UNIQUE NOT NULL,
-    phone_number VARCHAR(50) NOT NULL,
-    gender VARCHAR(20) NOT NULL,
-    address TEXT NOT NULL
+    name VARCHAR NOT NULL,
+    email VARCHAR UNIQUE NOT NULL,
+    phone_number VARCHAR NOT NULL,
+    gender VARCHAR NOT NULL,
+    address VARCHAR NOT NULL,
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(phone_number, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(address, '')), 'C')
+    ) STORED
 );
+CREATE INDEX IF NOT EXISTS ix_patients_patient_id ON patients (patient_id);
+CREATE INDEX IF NOT EXISTS ix_patients_search_vector ON patients USING GIN (search_vector);
 
-INSERT INTO patients (name, email, phone_number, gender, address) VALUES 
+INSERT INTO patients (name, email, phone_number, gender, address) VALUES
 ('John Doe', 'john.doe@email.com', '081234567890', 'Male', 'Jl. Merdeka No. 123, Jakarta'),
 ('Jane Smith', 'jane.smith@email.com', '081234567891', 'Female', 'Jl. Sudirman No. 456, Jakarta');
 
@@ -38,14 +53,21 @@ INSERT INTO patients (name, email, phone_number, gender, address) VALUES
 
 CREATE TABLE IF NOT EXISTS doctors (
     doctor_id SERIAL PRIMARY KEY,
-    name VARCHAR(255) NOT NULL,
-    specialization VARCHAR(255) NOT NULL,
-    phone_number VARCHAR(50) NOT NULL,
-    email VARCHAR(255) UNIQUE NOT NULL,
-    license_number VARCHAR(100) UNIQUE NOT NULL
+    name VARCHAR NOT NULL,
+    specialization VARCHAR NOT NULL,
+    phone_number VARCHAR NOT NULL,
+    email VARCHAR UNIQUE NOT NULL,
+    license_number VARCHAR UNIQUE NOT NULL,
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(specialization, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(phone_number, '')), 'C')
+    ) STORED
 );
+CREATE INDEX IF NOT EXISTS ix_doctors_doctor_id ON doctors (doctor_id);
+CREATE INDEX IF NOT EXISTS ix_doctors_search_vector ON doctors USING GIN (search_vector);
 
-INSERT INTO doctors (name, specialization, phone_number, email, license_number) VALUES 
+INSERT INTO doctors (name, specialization, phone_number, email, license_number) VALUES
 ('Dr. Sarah Wilson', 'Cardiology', '081234560001', 'dr.sarah@hospital.com', 'DOC-2024-001'),
 ('Dr. Michael Chen', 'Pediatrics', '081234560002', 'dr.michael@hospital.com', 'DOC-2024-002');
 
@@ -56,22 +78,59 @@ CREATE TABLE IF NOT EXISTS medical_records (
     record_id SERIAL PRIMARY KEY,
     patient_id INTEGER NOT NULL,
     doctor_id INTEGER NOT NULL,
-    diagnosis TEXT NOT NULL,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    diagnosis VARCHAR NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
 );
+CREATE INDEX IF NOT EXISTS ix_medical_records_record_id ON medical_records (record_id);
+CREATE INDEX IF NOT EXISTS ix_medical_records_patient_id ON medical_records (patient_id);
+CREATE INDEX IF NOT EXISTS ix_medical_records_doctor_id ON medical_records (doctor_id);
 
 CREATE TABLE IF NOT EXISTS prescriptions (
-    prescription_id SERIAL PRIMARY KEY,
-    record_id INTEGER NOT NULL,
-    dosage VARCHAR(255) NOT NULL,
-    instructions TEXT NOT NULL,
-    medicine_recipe TEXT NOT NULL
+    id SERIAL PRIMARY KEY,
+    "patientName" VARCHAR NOT NULL,
+    "doctorName" VARCHAR NOT NULL,
+    status VARCHAR,
+    "createdAt" TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    "updatedAt" TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS ix_prescriptions_id ON prescriptions (id);
+CREATE INDEX IF NOT EXISTS ix_prescriptions_status ON prescriptions (status);
+CREATE INDEX IF NOT EXISTS "ix_prescriptions_patientName" ON prescriptions ("patientName");
+CREATE INDEX IF NOT EXISTS "ix_prescriptions_doctorName" ON prescriptions ("doctorName");
+CREATE INDEX IF NOT EXISTS "ix_prescriptions_createdAt" ON prescriptions ("createdAt");
+CREATE INDEX IF NOT EXISTS "ix_prescriptions_status_createdAt" ON prescriptions (status, "createdAt");
+
+CREATE TABLE IF NOT EXISTS prescription_items (
+    id SERIAL PRIMARY KEY,
+    prescription_id INTEGER REFERENCES prescriptions (id),
+    medicine_id INTEGER NOT NULL,
+    medicine_name VARCHAR NOT NULL,
+    quantity INTEGER NOT NULL,
+    instructions VARCHAR,
+    "updatedAt" TIMESTAMP WITH TIME ZONE DEFAULT now()
 );
+CREATE INDEX IF NOT EXISTS ix_prescription_items_id ON prescription_items (id);
+CREATE INDEX IF NOT EXISTS ix_prescription_items_prescription_id ON prescription_items (prescription_id);
+CREATE INDEX IF NOT EXISTS ix_prescription_items_medicine_id ON prescription_items (medicine_id);
 
-INSERT INTO medical_records (patient_id, doctor_id, diagnosis) VALUES 
+CREATE TABLE IF NOT EXISTS prescription_events (
+    id SERIAL PRIMARY KEY,
+    prescription_id INTEGER NOT NULL,
+    event VARCHAR NOT NULL,
+    status VARCHAR,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS ix_prescription_events_prescription_id ON prescription_events (prescription_id);
+
+INSERT INTO medical_records (patient_id, doctor_id, diagnosis) VALUES
 (1, 1, 'Hypertension - High blood pressure detected'),
 (2, 2, 'Common Cold - Viral infection');
 
-INSERT INTO prescriptions (record_id, dosage, instructions, medicine_recipe) VALUES 
-(1, '10mg once daily', 'Take with food in the morning', 'Amlodipine 10mg - 30 tablets'),
-(2, '500mg three times daily', 'Take after meals for 5 days', 'Paracetamol 500mg - 15 tablets');
\ No newline at end of file
+INSERT INTO prescriptions ("patientName", "doctorName", status) VALUES
+('John Doe', 'Dr. Sarah Wilson', 'pending'),
+('Jane Smith', 'Dr. Michael Chen', 'pending');
+
+INSERT INTO prescription_items (prescription_id, medicine_id, medicine_name, quantity, instructions) VALUES
+(1, 1, 'Amlodipine 10mg', 30, '10mg once daily, take with food in the morning'),
+(2, 2, 'Paracetamol 500mg', 15, '500mg three times daily after meals for 5 days');
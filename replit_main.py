@@ -32,6 +32,9 @@ def main():
         elif "records" in service_dir:
             env["DATABASE_URL"] = "sqlite:///./records.db"
 
+        # Bring the schema up to date first; the services do not create tables themselves
+        subprocess.run([sys.executable, "migrate.py"], cwd=service_dir, env=env, check=True)
+
         # Run uvicorn in the service directory to ensure local imports work
         cmd = [
             sys.executable, "-m", "uvicorn", 
@@ -1,9 +1,11 @@
 
 import requests
 import json
+import sys
 
 PRESC_ID = 1
 URL = f"http://localhost:8000/api/prescriptions/{PRESC_ID}"
+BULK_URL = "http://localhost:8000/api/prescriptions/status"
 
 def complete_payment():
     payload = {
@@ -27,5 +29,28 @@ def complete_payment():
     except Exception as e:
         print(f"Error: {e}")
 
+def complete_payments(prescription_ids):
+    # Reconciliation: every paid prescription in one request and one transaction
+    payload = {"updates": [{"id": i, "status": "processed"} for i in prescription_ids]}
+
+    try:
+        response = requests.patch(BULK_URL, json=payload)
+        print(f"Status Code: {response.status_code}")
+        if response.status_code == 200:
+            result = response.json()
+            print(f"Updated {result['updated']} of {len(prescription_ids)}")
+            for r in result["results"]:
+                if not r["success"]:
+                    print(f"  #{r['id']}: {r['message']}")
+        else:
+            print(f"Update Failed: {response.text}")
+
+    except Exception as e:
+        print(f"Error: {e}")
+
 if __name__ == "__main__":
-    complete_payment()
+    # python simulate_pharmacy_payment.py 1 2 3  -> bulk update of those ids
+    if len(sys.argv) > 1:
+        complete_payments([int(a) for a in sys.argv[1:]])
+    else:
+        complete_payment()